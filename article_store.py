@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+# pyarrow is only needed for the Parquet format; JSONL works without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+STORE_DIR = "article_store"
+FORMATS = ("jsonl", "parquet")
+
+# Unified article schema shared by every scraper
+ARTICLE_FIELDS = ("article_url", "story_id", "title", "full_content", "image_url", "published_at",
+                  "category", "content_length", "source", "scraped_at")
+# Everything except the body; JSONL keeps these in separate files so metadata
+# can be read without touching the bodies
+META_FIELDS = tuple(field for field in ARTICLE_FIELDS if field != "full_content")
+CONTENT_FIELDS = ("article_url", "full_content")
+
+# Records buffered per partition before a JSONL flush or Parquet row group
+DEFAULT_BATCH_SIZE = 500
+# A partition starts a new file once the current one passes this size
+DEFAULT_MAX_FILE_BYTES = 64 * 2**20
+
+if HAVE_PYARROW:
+    ARTICLE_SCHEMA = pa.schema([(field, pa.int64() if field == "content_length" else pa.string())
+                                for field in ARTICLE_FIELDS])
+
+
+def normalize_article(record, source=""):
+    """Map a scraper's fields onto the unified schema, filling the derived columns"""
+    article = {field: record.get(field) for field in ARTICLE_FIELDS}
+    for field in ARTICLE_FIELDS:
+        if field != "content_length" and article[field] is not None:
+            article[field] = str(article[field])
+    article["full_content"] = article["full_content"] or ""
+    if article["content_length"] is None:
+        article["content_length"] = len(article["full_content"])
+    article["content_length"] = int(article["content_length"])
+    article["source"] = article["source"] or source
+    article["scraped_at"] = article["scraped_at"] or datetime.now(timezone.utc).isoformat()
+    if not article["category"] and article["article_url"]:
+        # First path segment of https://host/section/...
+        segments = [segment for segment in article["article_url"].split('/')[3:] if segment]
+        article["category"] = segments[0] if segments else ""
+    return article
+
+
+def partition_of(article):
+    """(date, category) partition of an article: its publication date, else the scrape date"""
+    date = (article["published_at"] or article["scraped_at"] or "")[:10]
+    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date):
+        date = "unknown"
+    category = re.sub(r'[^\w-]+', '_', article["category"] or "") or "unknown"
+    return date, category
+
+
+def _partition_dir(root, date, category):
+    return os.path.join(root, f"date={date}", f"category={category}")
+
+
+class ArticleStore:
+    """
+    Append-only article sink with one schema for every scraper. Articles are
+    buffered and written in batches to date/category partitions
+    (root/date=YYYY-MM-DD/category=NAME/), as JSONL (metadata and bodies in
+    parallel files) or Parquet (one row group per batch). A partition moves
+    to a new file once the current one exceeds `max_file_bytes`.
+    """
+
+    def __init__(self, root=STORE_DIR, format="jsonl", source="", batch_size=DEFAULT_BATCH_SIZE,
+                 max_file_bytes=DEFAULT_MAX_FILE_BYTES):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown store format '{format}', expected one of {FORMATS}")
+        if format == "parquet" and not HAVE_PYARROW:
+            raise ImportError("The 'parquet' store format requires pyarrow")
+        self.root = root
+        self.format = format
+        self.source = source
+        self.batch_size = batch_size
+        self.max_file_bytes = max_file_bytes
+        self.buffers = {}
+        self.writers = {}
+        # Files written by this store carry a per-run prefix, so concurrent or
+        # later runs never append to a Parquet file another run has closed
+        self.run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self.sequence = {}
+        self.written = 0
+
+    def append(self, record):
+        """Buffer one article (a dict with scraper fields); flushes its partition when the batch is full"""
+        article = normalize_article(record, source=self.source)
+        partition = partition_of(article)
+        buffer = self.buffers.setdefault(partition, [])
+        buffer.append(article)
+        if len(buffer) >= self.batch_size:
+            self._flush_partition(partition)
+
+    def flush(self):
+        for partition in list(self.buffers):
+            self._flush_partition(partition)
+
+    def _file_path(self, partition, kind, extension):
+        sequence = self.sequence.get(partition, 0)
+        return os.path.join(_partition_dir(self.root, *partition), f"{kind}-{self.run_id}-{sequence:05d}.{extension}")
+
+    def _rotate_if_full(self, partition, path):
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes:
+            writer = self.writers.pop(partition, None)
+            if writer is not None:
+                writer.close()
+            self.sequence[partition] = self.sequence.get(partition, 0) + 1
+
+    def _flush_partition(self, partition):
+        articles = self.buffers.pop(partition, [])
+        if not articles:
+            return
+        os.makedirs(_partition_dir(self.root, *partition), exist_ok=True)
+        if self.format == "jsonl":
+            # Bodies dominate the size, so the content file decides when both rotate
+            self._rotate_if_full(partition, self._file_path(partition, "content", "jsonl"))
+            with open(self._file_path(partition, "meta", "jsonl"), "a", encoding="utf-8") as meta_file, \
+                    open(self._file_path(partition, "content", "jsonl"), "a", encoding="utf-8") as content_file:
+                for article in articles:
+                    meta_file.write(json.dumps({field: article[field] for field in META_FIELDS},
+                                               ensure_ascii=False) + "\n")
+                    content_file.write(json.dumps({field: article[field] for field in CONTENT_FIELDS},
+                                                  ensure_ascii=False) + "\n")
+        else:
+            path = self._file_path(partition, "part", "parquet")
+            self._rotate_if_full(partition, path)
+            writer = self.writers.get(partition)
+            if writer is None:
+                writer = pq.ParquetWriter(self._file_path(partition, "part", "parquet"), ARTICLE_SCHEMA,
+                                          compression="zstd")
+                self.writers[partition] = writer
+            # Each flush is one row group, so readers can skip groups and columns
+            writer.write_table(pa.Table.from_pylist(articles, schema=ARTICLE_SCHEMA))
+        self.written += len(articles)
+
+    def close(self):
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_store(format="jsonl", source="", root=STORE_DIR):
+    """
+    Open the store a scraper appends its saved articles to, next to its CSV
+    (which is still written for existing consumers). Returns None for
+    format=None, and the scraper then writes only the CSV. The summarizers
+    read it back with read_articles when called with from_store.
+    """
+    if format is None:
+        return None
+    return ArticleStore(root=root, format=format, source=source)
+
+
+def _partitions(root, since=None, categories=None):
+    """Partition directories to read, pruned by date (YYYY-MM-DD string) and category"""
+    if not os.path.isdir(root):
+        return []
+    selected = []
+    for date_dir in sorted(os.listdir(root)):
+        if not date_dir.startswith("date="):
+            continue
+        date = date_dir[len("date="):]
+        if since and date != "unknown" and date < since:
+            continue
+        for category_dir in sorted(os.listdir(os.path.join(root, date_dir))):
+            category = category_dir[len("category="):]
+            if categories and category not in categories:
+                continue
+            selected.append(os.path.join(root, date_dir, category_dir))
+    return selected
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Blank, or the last line of a file a crashed run left half-written
+                continue
+
+
+def iter_articles(root=STORE_DIR, columns=None, since=None, categories=None):
+    """
+    Yield articles as dicts holding only `columns` (default: all), from the
+    partitions published on or after `since` (YYYY-MM-DD) in `categories`.
+    JSONL metadata columns are read without opening the body files, and the
+    bodies without the metadata; Parquet reads only the requested columns.
+    """
+    columns = list(columns or ARTICLE_FIELDS)
+    need_meta = any(column not in CONTENT_FIELDS for column in columns)
+    need_content = "full_content" in columns
+
+    for partition_dir in _partitions(root, since=since, categories=categories):
+        for name in sorted(os.listdir(partition_dir)):
+            path = os.path.join(partition_dir, name)
+            if name.endswith(".parquet"):
+                try:
+                    parquet_file = pq.ParquetFile(path)
+                except Exception as e:
+                    # Files still being written have no footer yet
+                    print(f"Skipping unreadable store file {path}: {e}")
+                    continue
+                for group in range(parquet_file.num_row_groups):
+                    yield from parquet_file.read_row_group(group, columns=columns).to_pylist()
+            elif name.startswith("content-") and name.endswith(".jsonl"):
+                meta_path = os.path.join(partition_dir, "meta-" + name[len("content-"):])
+                if not need_content:
+                    rows = _read_jsonl(meta_path)
+                elif not need_meta:
+                    rows = _read_jsonl(path)
+                else:
+                    # Metadata and body files are written line for line in the same order
+                    rows = (dict(meta, **body) for meta, body in zip(_read_jsonl(meta_path), _read_jsonl(path)))
+                for row in rows:
+                    yield {column: row.get(column) for column in columns}
+
+
+def read_articles(root=STORE_DIR, columns=None, since=None, categories=None, latest_only=True):
+    """
+    Load articles into a pandas DataFrame with only `columns`. With
+    latest_only, re-scraped articles (same URL, or same story id when the
+    URL is missing) keep just their newest row.
+    """
+    import pandas as pd
+    columns = list(columns or ARTICLE_FIELDS)
+    read_columns = list(columns)
+    if latest_only:
+        for column in ("article_url", "story_id", "scraped_at"):
+            if column not in read_columns:
+                read_columns.append(column)
+    df = pd.DataFrame(list(iter_articles(root, columns=read_columns, since=since, categories=categories)),
+                      columns=read_columns)
+    if latest_only and not df.empty:
+        key = df["article_url"].where(df["article_url"].fillna("") != "", "story:" + df["story_id"].fillna(""))
+        df = df.assign(_key=key).sort_values("scraped_at", kind="stable").drop_duplicates("_key", keep="last")
+    return df[columns].reset_index(drop=True)
@@ -0,0 +1,49 @@
+import re
+
+# Sentence terminators: the Bengali dari plus ! and ?
+SENTENCE_END = r'[।!?]'
+
+# Bengali words (letters with their vowel signs) or runs of Latin letters/digits
+TOKEN_PATTERN = re.compile(r'[\u0980-\u09FF]+|[A-Za-z0-9]+')
+
+
+def clean_text(text):
+    """Clean text by removing extra whitespace and newlines"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def split_into_sentences(text):
+    """Split Bengali text into sentences"""
+    # Simple rule-based sentence splitting for Bengali
+    # This is a basic implementation and might need improvement
+    sentences = re.split(SENTENCE_END, text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def tokenize(sentence):
+    """Split a sentence into lowercased word tokens, dropping punctuation"""
+    return [token.lower() for token in TOKEN_PATTERN.findall(sentence)]
+
+
+def pack_windows(units, lengths, max_tokens):
+    """
+    Group consecutive units (sentences or words) into windows whose token
+    lengths, plus one separator token per unit, stay within `max_tokens`.
+    A unit longer than that gets a window of its own. Returns lists of units.
+    """
+    windows = []
+    current = []
+    current_tokens = 0
+    for unit, length in zip(units, lengths):
+        if current and current_tokens + length + 1 > max_tokens:
+            windows.append(current)
+            current = []
+            current_tokens = 0
+        current.append(unit)
+        current_tokens += length + 1
+    if current:
+        windows.append(current)
+    return windows
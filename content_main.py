@@ -1,9 +1,14 @@
-import requests
+import http_cache
 from bs4 import BeautifulSoup
-import csv
-import time
-import random
+import csv_output
+import article_store
+import html_extract
+from crawl_state import CrawlState, content_hash
 import re
+from prothom_alo_api import fetch_story_by_url, story_fields
+from crawl_engine import crawl, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST
+from discovery import discover_article_links
+from frontier import build_frontier
 
 def clean_text(text):
     """Clean text by removing extra whitespace and newlines"""
@@ -12,128 +17,161 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def scrape_prothom_alo_story_elements():
+def parse_story_elements(html, article_url, backend=html_extract.DEFAULT_BACKEND):
+    """
+    Extract (title, content, image_url, published_at) from an article page,
+    taking the body only from 'story-element-text' elements.
+    `backend` picks the single-pass lxml extractor or the BeautifulSoup code.
+    """
+    if backend != "bs4":
+        title, article_content, image_url, published_at, used_fallback = html_extract.extract_story_elements(html)
+        if used_fallback:
+            print(f"No story-element-text found for article: {article_url}")
+            print(f"Used fallback method and found {len(article_content)} characters")
+        elif not article_content:
+            print(f"No story-element-text found for article: {article_url}")
+            article_content = "Content extraction failed - no story-element-text found"
+        return title, article_content, image_url, published_at
+
+    # Parse article HTML
+    article_soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract title
+    title_element = article_soup.select_one('h1')
+    title = clean_text(title_element.text) if title_element else "No title found"
+    
+    # Extract publication date
+    date_element = article_soup.select_one('time')
+    published_at = date_element.get('datetime') if date_element else ""
+    
+    # Extract main image
+    image_element = article_soup.select_one('figure img')
+    image_url = ""
+    if image_element:
+        image_url = image_element.get('src')
+        if not image_url:
+            image_url = image_element.get('data-src', '')
+    
+    # FOCUS: Extract content ONLY from story-element-text elements
+    article_content = ""
+    
+    # Find all elements with class 'story-element-text' or 'story-element story-element-text'
+    story_elements = article_soup.select('.story-element-text')
+    
+    if story_elements:
+        for element in story_elements:
+            # Extract text from each story element
+            element_text = element.get_text(strip=True)
+            if element_text:
+                article_content += element_text + "\n\n"
+    
+    # Clean up the content
+    article_content = article_content.strip()
+    
+    if not article_content:
+        print(f"No story-element-text found for article: {article_url}")
+        # Fallback: Try another common content selector just for this article
+        fallback_elements = article_soup.select('.storyContent p')
+        if fallback_elements:
+            for p in fallback_elements:
+                article_content += p.get_text(strip=True) + "\n\n"
+            article_content = article_content.strip()
+            print(f"Used fallback method and found {len(article_content)} characters")
+        else:
+            article_content = "Content extraction failed - no story-element-text found"
+    
+    return title, article_content, image_url, published_at
+
+def parse_fetched_story(article_url, fetched):
+    """
+    Parse stage of the crawl, run in a worker process: turn a fetched
+    (api_fields, html) pair into (title, content, image_url, published_at)
+    """
+    api_fields, html = fetched
+    if api_fields:
+        return api_fields
+    return parse_story_elements(html, article_url)
+
+def scrape_prothom_alo_story_elements(concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+                                      output_mode="upsert", recrawl_after=None, use_api=True, parse_workers=None,
+                                      discovery="sitemap", since=None, max_articles=20, category_quotas=None,
+                                      store_format="jsonl"):
     """
     Scrape latest news articles from Prothom Alo focusing specifically on
-    extracting content from 'story-element story-element-text' elements
+    extracting content from 'story-element story-element-text' elements.
+    Writes prothom_alo_full_content.csv, the file the summarizers read.
     """
     print("Starting to scrape Prothom Alo articles (story-element-text extraction)...")
     
-    # Headers to mimic a browser
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
-    }
-    
-    # Base URL and homepage URL
-    base_url = "https://www.prothomalo.com"
-    home_url = base_url
+    # Output CSV; it also scopes this scraper's entries in the crawl state
+    csv_filename = 'prothom_alo_full_content.csv'
+
+    # Incremental runs only fetch articles the crawl state has not seen yet
+    incremental = output_mode != "overwrite"
+    state = CrawlState(scope=csv_filename)
+    store = article_store.open_store(store_format, source="content_main")
     
     # Create CSV file for storing data
-    csv_filename = 'prothom_alo_full_content.csv'
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['title', 'full_content', 'image_url', 'article_url', 'published_at'])
+    header = ['title', 'full_content', 'image_url', 'article_url', 'published_at']
+    with csv_output.open_csv(csv_filename, header, mode=output_mode, key_column='article_url') as writer:
+        # A new CSV (first run, or the old one was moved aside) has none of the
+        # stories in the crawl state, so this run fetches everything again
+        incremental = incremental and not writer.fresh
         
         try:
-            print("Fetching homepage to extract article links...")
-            response = requests.get(home_url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse homepage HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find article links on the homepage
-            article_links = []
-            categories = ['bangladesh', 'world', 'economy', 'sports', 'entertainment', 'opinion', 'lifestyle', 'technology']
+            # Rank the discovered articles that are new, edited or due for a recrawl
+            frontier = build_frontier(discover_article_links(discovery, since=since), state,
+                                      incremental=incremental, recrawl_after=recrawl_after, quotas=category_quotas)
             
-            # Look for article cards or links in major categories
-            for category in categories:
-                category_selector = f'a[href*="/{category}/"]'
-                category_links = soup.select(category_selector)
-                
-                for element in category_links:
-                    href = element.get('href')
-                    if href and '/video/' not in href and '/gallery/' not in href:
-                        # Make sure it's a full URL
-                        if not href.startswith('http'):
-                            href = base_url + href
-                        article_links.append(href)
-            
-            # Take unique articles, up to 20
-            unique_articles = list(set(article_links))[:20]
+            # Spend the crawl budget on the most valuable articles first
+            unique_articles = [url for url, _, _, _ in frontier.take(max_articles)]
             
             print(f"Found {len(unique_articles)} unique article links. Processing...")
             
-            # Process each article
-            for i, article_url in enumerate(unique_articles):
-                try:
-                    # Add a random delay to avoid being blocked
-                    time.sleep(random.uniform(3, 5))
-                    
-                    print(f"Fetching article {i+1}/{len(unique_articles)}: {article_url}")
-                    article_response = requests.get(article_url, headers=headers)
-                    article_response.raise_for_status()
-                    
-                    # Parse article HTML
-                    article_soup = BeautifulSoup(article_response.text, 'html.parser')
-                    
-                    # Extract title
-                    title_element = article_soup.select_one('h1')
-                    title = clean_text(title_element.text) if title_element else "No title found"
-                    
-                    # Extract publication date
-                    date_element = article_soup.select_one('time')
-                    published_at = date_element.get('datetime') if date_element else ""
-                    
-                    # Extract main image
-                    image_element = article_soup.select_one('figure img')
-                    image_url = ""
-                    if image_element:
-                        image_url = image_element.get('src')
-                        if not image_url:
-                            image_url = image_element.get('data-src', '')
-                    
-                    # FOCUS: Extract content ONLY from story-element-text elements
-                    article_content = ""
-                    
-                    # Find all elements with class 'story-element-text' or 'story-element story-element-text'
-                    story_elements = article_soup.select('.story-element-text')
-                    
-                    if story_elements:
-                        for element in story_elements:
-                            # Extract text from each story element
-                            element_text = element.get_text(strip=True)
-                            if element_text:
-                                article_content += element_text + "\n\n"
-                    
-                    # Clean up the content
-                    article_content = article_content.strip()
-                    
-                    if not article_content:
-                        print(f"No story-element-text found for article: {article_url}")
-                        # Fallback: Try another common content selector just for this article
-                        fallback_elements = article_soup.select('.storyContent p')
-                        if fallback_elements:
-                            for p in fallback_elements:
-                                article_content += p.get_text(strip=True) + "\n\n"
-                            article_content = article_content.strip()
-                            print(f"Used fallback method and found {len(article_content)} characters")
-                        else:
-                            article_content = "Content extraction failed - no story-element-text found"
-                    
-                    # Write to CSV
-                    writer.writerow([title, article_content, image_url, article_url, published_at])
-                    print(f"Saved article successfully ({len(article_content)} characters)")
-                    
-                except Exception as e:
-                    print(f"Error processing article {article_url}: {e}")
+            # Fetch articles concurrently; fetched pages are parsed in worker processes
+            # and written as they arrive.
+            # The story API is tried first, the HTML page is only downloaded when it fails.
+            def fetch_article(article_url):
+                story = fetch_story_by_url(article_url) if use_api else None
+                if story:
+                    fields = story_fields(story)
+                    if fields[1]:
+                        return fields, None
+                article_response = http_cache.cached_get(article_url)
+                article_response.raise_for_status()
+                return None, article_response.text
+
+            def save_article(article_url, index, parsed):
+                title, article_content, image_url, published_at = parsed
+                print(f"Fetched article {index+1}/{len(unique_articles)}: {article_url}")
+                # Failed extractions are not recorded, so the next run retries them
+                status = "new"
+                if not article_content.startswith("Content extraction failed"):
+                    status = state.record(article_url, article_url, content_hash(title, article_content, image_url),
+                                          published_at=published_at)
+                if incremental and status == "unchanged":
+                    print(f"Article unchanged since last run: {article_url}")
+                    return
+
+                # Write to CSV
+                writer.writerow([title, article_content, image_url, article_url, published_at])
+                if store is not None:
+                    store.append({"title": title, "full_content": article_content, "image_url": image_url,
+                                  "article_url": article_url, "published_at": published_at})
+                print(f"Saved article successfully ({len(article_content)} characters)")
+
+            jobs = [(article_url, i) for i, article_url in enumerate(unique_articles)]
+            crawl(jobs, fetch_article, save_article, concurrency=concurrency, rate_per_host=rate_per_host,
+                  parse=parse_fetched_story, parse_workers=parse_workers)
                     
         except Exception as e:
             print(f"Error: {e}")
     
+    state.close()
+    if store is not None:
+        store.close()
     print(f"\nScraping completed. Data saved to '{csv_filename}'")
+    http_cache.print_cache_stats()
 
 if __name__ == "__main__":
     scrape_prothom_alo_story_elements()
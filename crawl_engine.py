@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import rate_limiter
+
+# Default crawl settings: how many fetches may be in flight at once, and how many
+# requests per second a single host starts at before the rate limiter adapts it
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_HOST = rate_limiter.INITIAL_RATE
+
+
+def _default_on_error(url, context, error):
+    print(f"Error processing article {url}: {error}")
+
+
+def _deliver(on_result, on_error, url, context, result):
+    try:
+        on_result(url, context, result)
+    except Exception as e:
+        on_error(url, context, e)
+
+
+async def crawl_async(jobs, fetch, on_result, concurrency=DEFAULT_CONCURRENCY,
+                      rate_per_host=DEFAULT_RATE_PER_HOST, on_error=None,
+                      parse=None, parse_workers=None):
+    """
+    Run `fetch(url)` for every (url, context) job with at most `concurrency`
+    fetches in flight. Requests made through http_session are paced per host
+    by the shared adaptive rate limiter, which starts new hosts at
+    `rate_per_host` requests per second and then follows the server.
+
+    `fetch` is a blocking callable (e.g. a requests call) and runs in a worker
+    thread; `on_result(url, context, response)` runs on the event loop thread,
+    so it can safely write to a shared CSV writer. `jobs` may be a lazy
+    iterator; it is consumed as workers become free, never materialised.
+    Jobs with a url of None are passed straight to `on_result` with a None
+    response, for items whose data is already in hand.
+
+    With `parse`, fetching and parsing become separate stages: whatever
+    `fetch` returns (raw HTML, not a response object, since it is pickled) is
+    handed to `parse(url, payload)` in a process pool of `parse_workers`
+    processes (default: one per core), and `on_result` receives the parsed
+    result. Workers go back to fetching while their pages are being parsed.
+    parse_workers=0 parses inline on the event loop thread instead.
+    """
+    on_error = on_error or _default_on_error
+    rate_limiter.limiter.configure(initial_rate=rate_per_host)
+    job_iter = iter(jobs)
+    job_lock = asyncio.Lock()
+
+    loop = asyncio.get_running_loop()
+    parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+    pool = None
+    if parse is not None and parse_workers > 0:
+        # Workers start lazily, once fetch threads are running; forking then could copy a lock
+        # (stdout, the rate limiter) held by another thread, so start them from a clean process
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=context)
+    # Bound the number of fetched pages waiting to be parsed, to bound memory
+    parse_slots = asyncio.Semaphore(2 * max(1, parse_workers))
+    parse_tasks = set()
+
+    async def parse_stage(url, context, payload):
+        try:
+            parsed = await loop.run_in_executor(pool, parse, url, payload)
+        except Exception as e:
+            on_error(url, context, e)
+            return
+        finally:
+            parse_slots.release()
+        _deliver(on_result, on_error, url, context, parsed)
+
+    async def next_job():
+        # The job iterator may itself do blocking I/O (e.g. paging through an
+        # API listing), so it is advanced in a thread, one worker at a time
+        async with job_lock:
+            return await asyncio.to_thread(next, job_iter, None)
+
+    async def worker():
+        # Workers pull from the shared iterator, so jobs are consumed lazily
+        # and fetching starts as soon as the first job is available
+        while True:
+            job = await next_job()
+            if job is None:
+                return
+            url, context = job
+            if url is None:
+                # Nothing to fetch: the job already carries its data
+                _deliver(on_result, on_error, url, context, None)
+                continue
+            try:
+                response = await asyncio.to_thread(fetch, url)
+            except Exception as e:
+                on_error(url, context, e)
+                continue
+
+            if parse is None:
+                _deliver(on_result, on_error, url, context, response)
+            elif pool is None:
+                try:
+                    parsed = parse(url, response)
+                except Exception as e:
+                    on_error(url, context, e)
+                    continue
+                _deliver(on_result, on_error, url, context, parsed)
+            else:
+                await parse_slots.acquire()
+                task = asyncio.create_task(parse_stage(url, context, response))
+                parse_tasks.add(task)
+                task.add_done_callback(parse_tasks.discard)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        if parse_tasks:
+            await asyncio.gather(*list(parse_tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def crawl(jobs, fetch, on_result, concurrency=DEFAULT_CONCURRENCY,
+          rate_per_host=DEFAULT_RATE_PER_HOST, on_error=None, parse=None, parse_workers=None):
+    """Blocking entry point for crawl_async, for use from the plain scraper scripts"""
+    asyncio.run(crawl_async(jobs, fetch, on_result, concurrency=concurrency,
+                            rate_per_host=rate_per_host, on_error=on_error,
+                            parse=parse, parse_workers=parse_workers))
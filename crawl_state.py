@@ -0,0 +1,111 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+# SQLite file recording every story we have scraped, shared by all crawlers
+STATE_DB = "crawl_state.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    key TEXT PRIMARY KEY,
+    url TEXT,
+    story_id TEXT,
+    content_hash TEXT,
+    published_at TEXT,
+    first_seen REAL,
+    last_seen REAL,
+    last_scraped REAL
+)
+"""
+
+
+class CrawlState:
+    """
+    Persistent record of scraped stories, keyed by story id or article URL,
+    with the content hash and publish/scrape timestamps of the last version.
+    Keys are prefixed with `scope` (e.g. the output CSV), so scrapers writing
+    different outputs from the same database do not skip each other's stories.
+    """
+
+    def __init__(self, path=STATE_DB, scope=None):
+        self.path = path
+        self.scope = scope
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def _key(self, key):
+        return f"{self.scope}:{key}" if self.scope else str(key)
+
+    def get(self, key):
+        """Return the stored row for a key as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT key, url, story_id, content_hash, published_at, first_seen, last_seen, last_scraped "
+                "FROM stories WHERE key = ?", (self._key(key),)).fetchone()
+        if row is None:
+            return None
+        columns = ("key", "url", "story_id", "content_hash", "published_at", "first_seen", "last_seen", "last_scraped")
+        return dict(zip(columns, row))
+
+    def needs_fetch(self, key, published_at=None, recrawl_after=None):
+        """
+        Decide whether a story has to be (re)fetched: it is unknown, its
+        published/updated marker differs from the stored one, or it was last
+        scraped more than `recrawl_after` seconds ago
+        """
+        entry = self.get(key)
+        if entry is None:
+            return True
+        if published_at is not None and str(published_at) != (entry["published_at"] or ""):
+            return True
+        if recrawl_after is not None and time.time() - (entry["last_scraped"] or 0) > recrawl_after:
+            return True
+        self.touch(key)
+        return False
+
+    def touch(self, key):
+        """Mark a known story as still present in the latest listing"""
+        with self.lock:
+            self.conn.execute("UPDATE stories SET last_seen = ? WHERE key = ?", (time.time(), self._key(key)))
+            self.conn.commit()
+
+    def record(self, key, url, content_hash, story_id=None, published_at=None):
+        """
+        Upsert a freshly scraped story and return 'new', 'changed' or
+        'unchanged' depending on how its content hash compares to the stored one
+        """
+        now = time.time()
+        entry = self.get(key)
+        if entry is None:
+            status = "new"
+        elif entry["content_hash"] != content_hash:
+            status = "changed"
+        else:
+            status = "unchanged"
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO stories (key, url, story_id, content_hash, published_at, first_seen, last_seen, last_scraped) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET url = excluded.url, story_id = excluded.story_id, "
+                "content_hash = excluded.content_hash, published_at = excluded.published_at, "
+                "last_seen = excluded.last_seen, last_scraped = excluded.last_scraped",
+                (self._key(key), url, None if story_id is None else str(story_id), content_hash,
+                 "" if published_at is None else str(published_at), now, now, now))
+            self.conn.commit()
+        return status
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def content_hash(*fields):
+    """Stable hash of the scraped fields of a story, used to detect edits"""
+    digest = hashlib.sha256()
+    for field in fields:
+        digest.update(str(field or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
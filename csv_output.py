@@ -0,0 +1,100 @@
+import csv
+import os
+
+# 'overwrite' rewrites the file each run (the original behaviour), 'append' adds
+# rows to the existing file, 'upsert' appends and then keeps only the newest row
+# per key so an edited story replaces its earlier version
+OUTPUT_MODES = ("overwrite", "append", "upsert")
+
+
+class CsvOutput:
+    """
+    CSV writer that supports overwrite, append and keyed upsert output modes.
+    `fresh` is True when the run started a new file rather than adding to one.
+    """
+
+    def __init__(self, filename, header, mode="overwrite", key_column=None):
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode '{mode}', expected one of {OUTPUT_MODES}")
+        if mode == "upsert" and key_column not in header:
+            raise ValueError("Upsert output needs a key_column that is part of the header")
+        self.filename = filename
+        self.header = list(header)
+        self.mode = mode
+        self.key_index = self.header.index(key_column) if key_column in header else None
+        self.written_keys = set()
+
+        exists = os.path.exists(filename) and os.path.getsize(filename) > 0
+        if exists and mode != "overwrite" and _read_header(filename) != self.header:
+            # Keep the old rows; they may not be recoverable from anywhere else
+            backup = filename + ".bak"
+            os.replace(filename, backup)
+            print(f"Existing '{filename}' has a different header, moved it to '{backup}' and starting a new file")
+            exists = False
+        self.fresh = mode == "overwrite" or not exists
+        if self.fresh:
+            self.file = open(filename, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.header)
+        else:
+            self.file = open(filename, 'a', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        if self.key_index is not None:
+            # Compared with keys read back from the file, which are strings
+            self.written_keys.add(str(row[self.key_index]))
+
+    def close(self):
+        self.file.close()
+        if self.mode == "upsert" and self.written_keys:
+            drop_superseded_rows(self.filename, self.header[self.key_index], keys=self.written_keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _read_header(filename):
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        return next(csv.reader(file), None)
+
+
+def drop_superseded_rows(filename, key_column, keys=None):
+    """
+    Keep only the last row for every key in `keys` (all keys for None). The
+    file is streamed twice, so memory holds row positions, not the rows.
+    """
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None or key_column not in header:
+            return
+        key_index = header.index(key_column)
+        last_index = {}
+        rows = 0
+        for i, row in enumerate(reader):
+            rows += 1
+            if len(row) > key_index and (keys is None or row[key_index] in keys):
+                last_index[row[key_index]] = i
+    if len(last_index) == rows:
+        return
+
+    tmp_filename = filename + ".tmp"
+    with open(filename, 'r', newline='', encoding='utf-8') as source, \
+            open(tmp_filename, 'w', newline='', encoding='utf-8') as target:
+        reader = csv.reader(source)
+        writer = csv.writer(target)
+        writer.writerow(next(reader))
+        for i, row in enumerate(reader):
+            if len(row) <= key_index or row[key_index] not in last_index or last_index[row[key_index]] == i:
+                writer.writerow(row)
+    os.replace(tmp_filename, filename)
+
+
+def open_csv(filename, header, mode="overwrite", key_column=None):
+    """Open a CsvOutput; use it as a context manager in place of open() + csv.writer()"""
+    return CsvOutput(filename, header, mode=mode, key_column=key_column)
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+import time
+import pandas as pd
+
+# Articles read, summarized and written per step
+DEFAULT_CHUNK_SIZE = 200
+
+
+def checkpoint_path_for(output_csv):
+    return output_csv + ".checkpoint.json"
+
+
+def input_signature(path):
+    """Size and modification time of the input, so a rewritten file invalidates a checkpoint"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_checkpoint(path):
+    """Return the saved progress dict, or None when there is no usable checkpoint"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves a half-written file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def stream_summaries(input_csv, output_csv, summarize_chunk, summary_column, text_column='full_content',
+                     chunk_size=DEFAULT_CHUNK_SIZE, max_rows=None, resume=True):
+    """
+    Summarize `input_csv` chunk by chunk into `output_csv`. `summarize_chunk`
+    gets a list of texts and returns one summary per text. Each finished
+    chunk is appended to the output and fsynced before the checkpoint
+    (rows done, output size) is advanced, so after a crash the run resumes
+    from the last completed chunk: the output is truncated back to the
+    checkpointed size and the rows already done are skipped. A checkpoint is
+    discarded if the input has changed since (an upsert crawl rewrites it
+    and reorders rows). Memory is
+    bounded by the chunk size. Returns the number of rows written.
+    """
+    checkpoint_path = checkpoint_path_for(output_csv)
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    signature = input_signature(input_csv)
+    if checkpoint and checkpoint.get("input_signature") != signature:
+        print(f"Ignoring checkpoint {checkpoint_path}: {input_csv} has changed since it was written")
+        checkpoint = None
+    if checkpoint and (checkpoint.get("input") != os.path.abspath(input_csv)
+                       or checkpoint.get("summary_column") != summary_column
+                       or not os.path.exists(output_csv)):
+        print(f"Ignoring checkpoint {checkpoint_path}: it belongs to a different run")
+        checkpoint = None
+
+    rows_done = 0
+    if checkpoint:
+        rows_done = checkpoint["rows_done"]
+        # Drop anything written after the last checkpoint
+        with open(output_csv, "r+b") as f:
+            f.truncate(checkpoint["output_bytes"])
+        print(f"Resuming {output_csv} after {rows_done} rows")
+    elif os.path.exists(output_csv):
+        os.remove(output_csv)
+
+    start = time.perf_counter()
+    rows_seen = 0
+    rows_written = 0
+    for chunk in pd.read_csv(input_csv, chunksize=chunk_size):
+        # Rows finished by an earlier run are parsed but not summarized again
+        if rows_seen + len(chunk) <= rows_done:
+            rows_seen += len(chunk)
+            continue
+        if rows_seen < rows_done:
+            chunk = chunk.iloc[rows_done - rows_seen:]
+            rows_seen = rows_done
+        if max_rows is not None:
+            chunk = chunk.iloc[:max(0, max_rows - rows_seen)]
+            if chunk.empty:
+                break
+
+        if text_column not in chunk.columns:
+            print(f"Error: '{text_column}' column not found in the CSV.")
+            return rows_written
+
+        chunk = chunk.copy()
+        chunk[summary_column] = summarize_chunk(chunk[text_column].tolist())
+
+        write_header = rows_seen == 0
+        with open(output_csv, "a", encoding="utf-8", newline="") as f:
+            chunk.to_csv(f, index=False, header=write_header, quoting=csv.QUOTE_ALL)
+            f.flush()
+            os.fsync(f.fileno())
+            output_bytes = f.tell()
+
+        rows_seen += len(chunk)
+        rows_written += len(chunk)
+        save_checkpoint(checkpoint_path, {
+            "input": os.path.abspath(input_csv),
+            "input_signature": signature,
+            "summary_column": summary_column,
+            "rows_done": rows_seen,
+            "output_bytes": output_bytes,
+        })
+        elapsed = time.perf_counter() - start
+        print(f"{rows_seen} rows done ({rows_written / elapsed:.1f} rows/s)")
+
+    # The run is complete; a later run starts from scratch
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return rows_written
@@ -0,0 +1,209 @@
+import io
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup
+import http_cache
+import http_session
+
+BASE_URL = http_session.BASE_URL
+
+# Sections whose articles we crawl
+CATEGORIES = ['bangladesh', 'world', 'economy', 'sports', 'entertainment', 'opinion', 'lifestyle', 'technology']
+
+# Sitemaps are read from robots.txt; these are used when it lists none
+FALLBACK_SITEMAPS = [BASE_URL + "/sitemap.xml"]
+FEED_URLS = [BASE_URL + "/feed/"]
+
+# Without an explicit cutoff, discovery looks this far back
+DEFAULT_LOOKBACK = timedelta(days=2)
+# Sitemap indexes may nest; deeper levels are ignored
+MAX_SITEMAP_DEPTH = 3
+
+# Path segments that mark non-article pages inside a section
+_NON_ARTICLE_SEGMENTS = {'video', 'gallery', 'topic', 'author', 'collection', 'search', 'photo'}
+
+
+def parse_lastmod(value):
+    """Parse a sitemap (ISO 8601) or RSS (RFC 822) date into an aware datetime, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def normalize_url(url):
+    """Canonical form used for deduplication: no query, fragment or trailing slash"""
+    parts = urlparse(url)
+    return f"{parts.scheme or 'https'}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def article_category(url):
+    """Section of an article URL (its first path segment)"""
+    segments = [segment for segment in urlparse(url).path.split('/') if segment]
+    return segments[0] if segments else ""
+
+
+def is_article_url(url, categories=CATEGORIES):
+    """
+    True for article pages of the site in one of `categories`; section index
+    pages (/sports, /sports/cricket), videos and galleries are rejected
+    """
+    parts = urlparse(url)
+    if parts.netloc and parts.netloc != urlparse(BASE_URL).netloc:
+        return False
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if len(segments) < 2 or segments[0] not in categories:
+        return False
+    if _NON_ARTICLE_SEGMENTS.intersection(segments):
+        return False
+    # Article slugs are id-like (they contain digits) or sit below a sub-section;
+    # /section/sub-section pages have neither
+    return len(segments) >= 3 or any(ch.isdigit() for ch in segments[-1])
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_xml_entries(content):
+    """
+    Stream the entries of a sitemap, sitemap index, RSS or Atom document as
+    (kind, fields) pairs, kind being 'sitemap' (a child of an index) or
+    'url'. Each entry element is cleared once read, so memory stays flat.
+    """
+    for _, element in ET.iterparse(io.BytesIO(content), events=("end",)):
+        name = _local_name(element.tag)
+        if name not in ("sitemap", "url", "item", "entry"):
+            continue
+        fields = {}
+        for child in element.iter():
+            child_name = _local_name(child.tag)
+            text = (child.text or "").strip()
+            if child_name in ("loc", "link"):
+                # Atom links carry the URL in href
+                fields.setdefault("loc", text or child.get("href", ""))
+            elif child_name in ("lastmod", "publication_date", "pubDate", "updated", "published"):
+                fields.setdefault("lastmod", text)
+            elif child_name == "title" and element is not child:
+                fields.setdefault("title", text)
+        element.clear()
+        if fields.get("loc"):
+            yield ("sitemap" if name == "sitemap" else "url"), fields
+
+
+def sitemaps_from_robots(base_url=BASE_URL):
+    """Sitemap URLs listed in robots.txt"""
+    try:
+        response = http_cache.cached_get(base_url + "/robots.txt")
+        if response.status_code != 200:
+            return []
+    except Exception as e:
+        print(f"Could not read robots.txt: {e}")
+        return []
+    return [line.split(':', 1)[1].strip() for line in response.text.splitlines()
+            if line.lower().startswith('sitemap:')]
+
+
+def iter_feed(url, since=None, depth=0):
+    """
+    Yield {'url', 'lastmod', 'title'} for the entries of a sitemap or feed
+    modified at or after `since`, following sitemap indexes. Child sitemaps
+    whose lastmod is older than `since` are not fetched at all, and
+    unchanged documents are revalidated with a conditional GET.
+    """
+    try:
+        response = http_cache.cached_get(url)
+        if response.status_code != 200:
+            print(f"Skipping {url}: HTTP {response.status_code}")
+            return
+        entries = iter_xml_entries(response.content)
+        for kind, fields in entries:
+            lastmod = parse_lastmod(fields.get("lastmod"))
+            if since is not None and lastmod is not None and lastmod < since:
+                continue
+            if kind == "sitemap":
+                if depth < MAX_SITEMAP_DEPTH:
+                    yield from iter_feed(urljoin(url, fields["loc"]), since=since, depth=depth + 1)
+                continue
+            yield {"url": urljoin(url, fields["loc"]), "lastmod": lastmod, "title": fields.get("title", "")}
+    except ET.ParseError as e:
+        print(f"Could not parse {url}: {e}")
+    except Exception as e:
+        print(f"Could not read {url}: {e}")
+
+
+def discover_urls(since=None, sitemaps=None, feeds=None, categories=CATEGORIES, max_urls=None):
+    """
+    Yield deduplicated article entries ({'url', 'lastmod', 'title',
+    'category', 'source'}) from the site's sitemaps and feeds, newer than
+    `since` (a datetime; default DEFAULT_LOOKBACK ago). Entries are produced
+    as each document is parsed; sitemaps come first since they cover more.
+    """
+    if since is None:
+        since = datetime.now(timezone.utc) - DEFAULT_LOOKBACK
+    elif since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if sitemaps is None:
+        sitemaps = sitemaps_from_robots() or FALLBACK_SITEMAPS
+    feeds = FEED_URLS if feeds is None else feeds
+
+    seen = set()
+    for source in list(sitemaps) + list(feeds):
+        for entry in iter_feed(source, since=since):
+            url = normalize_url(entry["url"])
+            if url in seen or not is_article_url(url, categories):
+                continue
+            seen.add(url)
+            entry.update(url=url, category=article_category(url), source=source)
+            yield entry
+            if max_urls is not None and len(seen) >= max_urls:
+                return
+
+
+def homepage_article_links(categories=CATEGORIES):
+    """(url, category) pairs for the article links on the homepage, in page order"""
+    response = http_cache.cached_get(BASE_URL)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+
+    links = []
+    seen = set()
+    # Look for article cards or links in major categories
+    for category in categories:
+        for element in soup.select(f'a[href*="/{category}/"]'):
+            href = element.get('href')
+            if not href:
+                continue
+            url = normalize_url(urljoin(BASE_URL, href))
+            if url not in seen and is_article_url(url, categories):
+                seen.add(url)
+                links.append((url, category))
+    return links
+
+
+def discover_article_links(source="sitemap", since=None, categories=CATEGORIES):
+    """
+    Return article entries ({'url', 'category', 'lastmod', ...}) to crawl.
+    'sitemap' reads the sitemaps and feeds; 'homepage' scrapes the homepage
+    links, which carry no lastmod. Sitemap discovery falls back to the
+    homepage when it finds nothing.
+    """
+    if source == "sitemap":
+        print("Reading sitemaps and feeds to discover article links...")
+        entries = list(discover_urls(since=since, categories=categories))
+        if entries:
+            print(f"Discovered {len(entries)} article URLs from sitemaps and feeds")
+            return entries
+        print("No articles found in sitemaps or feeds, falling back to the homepage")
+    print("Fetching homepage to extract article links...")
+    return [{"url": url, "category": category, "lastmod": None, "title": "", "source": BASE_URL}
+            for url, category in homepage_article_links(categories)]
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+
+# Directory holding one memory-mapped matrix and index per model
+EMBEDDING_CACHE_DIR = "embedding_cache"
+
+# Maximum number of cached sentence embeddings per model (768-dim float32
+# BERT vectors take 3 KB each, so the default bound is about 600 MB)
+DEFAULT_MAX_ROWS = 200_000
+
+
+def normalize_sentence(sentence):
+    """Normalize a sentence for cache lookups: Unicode NFC and collapsed whitespace"""
+    sentence = unicodedata.normalize("NFC", sentence or "")
+    return re.sub(r'\s+', ' ', sentence).strip()
+
+
+def sentence_key(model_name, sentence):
+    """Cache key for a sentence under a given model"""
+    text = f"{model_name}\0{normalize_sentence(sentence)}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed sentence embedding cache for one model: a memory-mapped
+    float32 matrix of `max_rows` x `dim` plus a SQLite index from sentence
+    hash to matrix row. When full, the least recently used rows are reused.
+    """
+
+    def __init__(self, model_name, dim, cache_dir=EMBEDDING_CACHE_DIR, max_rows=DEFAULT_MAX_ROWS):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+
+        model_dir = os.path.join(cache_dir, re.sub(r'[^\w.-]+', '_', model_name))
+        os.makedirs(model_dir, exist_ok=True)
+        matrix_path = os.path.join(model_dir, "embeddings.f32")
+
+        self.conn = sqlite3.connect(os.path.join(model_dir, "index.db"), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER UNIQUE, last_used REAL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+        # A cache created with another shape cannot be reused
+        shape = f"{max_rows}x{dim}"
+        stored = self.conn.execute("SELECT value FROM meta WHERE name = 'shape'").fetchone()
+        if stored is None or stored[0] != shape or not os.path.exists(matrix_path):
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('shape', ?)", (shape,))
+            mode = "w+"
+        else:
+            mode = "r+"
+        self.conn.commit()
+        self.matrix = np.memmap(matrix_path, dtype=np.float32, mode=mode, shape=(max_rows, dim))
+
+    def lookup(self, sentences):
+        """
+        Return (embeddings, missing): a (len(sentences), dim) array holding the
+        cached vectors, and the indices of the sentences that were not cached
+        """
+        embeddings = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        keys = [sentence_key(self.model_name, sentence) for sentence in sentences]
+        rows = {}
+        with self.lock:
+            unique_keys = list(set(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, row in self.conn.execute(
+                        f"SELECT key, row FROM entries WHERE key IN ({placeholders})", chunk):
+                    rows[key] = row
+            if rows:
+                now = time.time()
+                self.conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                      [(now, key) for key in rows])
+                self.conn.commit()
+
+        missing = []
+        for i, key in enumerate(keys):
+            if key in rows:
+                embeddings[i] = self.matrix[rows[key]]
+            else:
+                missing.append(i)
+        return embeddings, missing
+
+    def store(self, sentences, embeddings):
+        """Add sentence embeddings, evicting the least recently used entries when full"""
+        new_items = {}
+        for sentence, embedding in zip(sentences, embeddings):
+            new_items[sentence_key(self.model_name, sentence)] = embedding
+        if not new_items:
+            return
+
+        with self.lock:
+            known = set()
+            keys = list(new_items)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                known.update(key for (key,) in self.conn.execute(
+                    f"SELECT key FROM entries WHERE key IN ({placeholders})", chunk))
+            new_keys = [key for key in keys if key not in known][:self.max_rows]
+            if not new_keys:
+                return
+
+            # Free rows first, then the least recently used ones. Rows are handed
+            # out in order and evicted rows are reused at once, so the rows in
+            # use are always 0..used-1
+            used = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            free_rows = list(range(used, min(self.max_rows, used + len(new_keys))))
+            evict_count = len(new_keys) - len(free_rows)
+            if evict_count > 0:
+                evicted = self.conn.execute(
+                    "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (evict_count,)).fetchall()
+                self.conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+                free_rows.extend(row for _, row in evicted)
+
+            now = time.time()
+            for key, row in zip(new_keys, free_rows):
+                self.matrix[row] = new_items[key]
+            self.matrix.flush()
+            self.conn.executemany("INSERT INTO entries (key, row, last_used) VALUES (?, ?, ?)",
+                                  [(key, row, now) for key, row in zip(new_keys, free_rows)])
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.matrix.flush()
+            self.conn.close()
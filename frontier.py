@@ -0,0 +1,200 @@
+import hashlib
+import heapq
+import math
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from discovery import normalize_url, article_category
+
+# Relative value of each section; unlisted sections get DEFAULT_CATEGORY_WEIGHT
+CATEGORY_WEIGHTS = {
+    'bangladesh': 1.0,
+    'world': 0.9,
+    'economy': 0.9,
+    'opinion': 0.8,
+    'sports': 0.7,
+    'technology': 0.7,
+    'entertainment': 0.6,
+    'lifestyle': 0.5,
+}
+DEFAULT_CATEGORY_WEIGHT = 0.5
+
+# A story loses half its freshness every FRESHNESS_HALF_LIFE hours after publication
+FRESHNESS_HALF_LIFE = 12.0
+# A scraped story becomes fully due for a recrawl after RECRAWL_HORIZON hours
+RECRAWL_HORIZON = 72.0
+# Share of the score from freshness; the rest comes from how overdue a (re)crawl is
+FRESHNESS_WEIGHT = 0.6
+# Each path level below /section/slug multiplies the score by DEPTH_DECAY
+DEPTH_DECAY = 0.9
+
+# Seen-set sizing: URLs it is built for and the accepted false-positive rate
+BLOOM_CAPACITY = 1_000_000
+BLOOM_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: `in` may give a false positive (at about
+    `error_rate` once `capacity` items are added) but never a false negative.
+    One million URLs take about 1.8 MB.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) already present"""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __len__(self):
+        return self.count
+
+
+def _to_datetime(value):
+    """Accept a datetime, an ISO 8601 string or epoch seconds"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)):
+        parsed = datetime.fromtimestamp(value, tz=timezone.utc)
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def score_url(url, category=None, published_at=None, last_scraped=None, now=None,
+              category_weights=CATEGORY_WEIGHTS):
+    """
+    Crawl value of a URL: the section weight times a mix of freshness (decays
+    with time since publication) and recrawl urgency (1 for never scraped,
+    growing with time since the last scrape), reduced for deeper paths
+    """
+    now = now or datetime.now(timezone.utc)
+    category = category or article_category(url)
+    weight = category_weights.get(category, DEFAULT_CATEGORY_WEIGHT)
+
+    published = _to_datetime(published_at)
+    if published is None:
+        freshness = 0.5
+    else:
+        age_hours = max(0.0, (now - published).total_seconds() / 3600)
+        freshness = 0.5 ** (age_hours / FRESHNESS_HALF_LIFE)
+
+    scraped = _to_datetime(last_scraped)
+    if scraped is None:
+        urgency = 1.0
+    else:
+        urgency = min(1.0, max(0.0, (now - scraped).total_seconds() / 3600 / RECRAWL_HORIZON))
+
+    depth = len([segment for segment in urlparse(url).path.split('/') if segment])
+    depth_factor = DEPTH_DECAY ** max(0, depth - 2)
+    return weight * depth_factor * (FRESHNESS_WEIGHT * freshness + (1 - FRESHNESS_WEIGHT) * urgency)
+
+
+class Frontier:
+    """
+    Priority queue of URLs to crawl: URLs are normalized, deduplicated
+    through a Bloom filter, scored with score_url and popped best first.
+    `quotas` caps how many URLs a category may hand out (a dict per
+    category, with `default_quota` for the rest), so a fixed budget is
+    spread over sections instead of going to one.
+    """
+
+    def __init__(self, quotas=None, default_quota=None, category_weights=CATEGORY_WEIGHTS,
+                 capacity=BLOOM_CAPACITY, now=None):
+        self.quotas = dict(quotas or {})
+        self.default_quota = default_quota
+        self.category_weights = category_weights
+        self.seen = BloomFilter(capacity)
+        self.heap = []
+        self.taken = {}
+        self.counter = 0
+        self.now = now or datetime.now(timezone.utc)
+
+    def push(self, url, category=None, published_at=None, last_scraped=None, context=None):
+        """Queue a URL unless it was already queued; returns True if it was added"""
+        url = normalize_url(url)
+        if not self.seen.add(url):
+            return False
+        category = category or article_category(url)
+        score = score_url(url, category, published_at, last_scraped, now=self.now,
+                          category_weights=self.category_weights)
+        # The counter keeps insertion order among equal scores
+        heapq.heappush(self.heap, (-score, self.counter, url, category, context))
+        self.counter += 1
+        return True
+
+    def _quota(self, category):
+        return self.quotas.get(category, self.default_quota)
+
+    def pop(self):
+        """
+        Return (url, category, score, context) for the best URL whose category
+        still has quota, or None when nothing is left
+        """
+        while self.heap:
+            neg_score, _, url, category, context = heapq.heappop(self.heap)
+            quota = self._quota(category)
+            if quota is not None and self.taken.get(category, 0) >= quota:
+                # Over quota: this section's remaining URLs are dropped for this run
+                continue
+            self.taken[category] = self.taken.get(category, 0) + 1
+            return url, category, -neg_score, context
+        return None
+
+    def take(self, budget=None):
+        """Pop up to `budget` URLs (all of them for None), best first"""
+        entries = []
+        while budget is None or len(entries) < budget:
+            entry = self.pop()
+            if entry is None:
+                break
+            entries.append(entry)
+        return entries
+
+    def __len__(self):
+        return len(self.heap)
+
+
+def build_frontier(entries, state, incremental=True, recrawl_after=None, quotas=None):
+    """
+    Queue discovered entries ({'url', 'category', 'lastmod'}) in a Frontier.
+    On incremental runs a URL in the crawl state is only queued when its
+    lastmod is newer than its last scrape or it is due for a recrawl; known
+    URLs are ranked with their last_scraped time.
+    """
+    frontier = Frontier(quotas=quotas)
+    for entry in entries:
+        known = state.get(entry["url"])
+        last_scraped = known["last_scraped"] if known else None
+        if incremental and known is not None:
+            edited = entry["lastmod"] is not None and entry["lastmod"].timestamp() > (last_scraped or 0)
+            if not edited and not state.needs_fetch(entry["url"], recrawl_after=recrawl_after):
+                continue
+        frontier.push(entry["url"], entry["category"], published_at=entry["lastmod"], last_scraped=last_scraped)
+    return frontier
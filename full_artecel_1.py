@@ -1,10 +1,15 @@
-import requests
+import http_cache
 from bs4 import BeautifulSoup
-import csv
-import time
-import random
+import csv_output
+import article_store
+import html_extract
+from crawl_state import CrawlState, content_hash
 import re
 import os
+from prothom_alo_api import fetch_story_by_url, story_fields
+from crawl_engine import crawl, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST
+from discovery import discover_article_links
+from frontier import build_frontier
 
 def clean_text(text):
     """Clean text by removing extra whitespace and newlines"""
@@ -13,368 +18,206 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def scrape_prothom_alo_full_content():
+def parse_full_article(html, article_url, backend=html_extract.DEFAULT_BACKEND):
     """
-    Scrape latest news articles from Prothom Alo with enhanced content extraction
-    to ensure full article text is captured
+    Extract (title, content, image_url, published_at) from an article page,
+    trying several content strategies until enough body text is found.
+    `backend` picks the single-pass lxml extractor or the BeautifulSoup code.
     """
-    print("Starting to scrape complete news articles from Prothom Alo...")
-    
-    # Headers to mimic a browser
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache"
-    }
-    
-    # Base URL and homepage URL
-    base_url = "https://www.prothomalo.com"
-    home_url = base_url
-    
-    # Create CSV file for storing data
-    csv_filename = 'prothom_alo_full_articles.csv'
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['title', 'full_content', 'image_url', 'article_url', 'published_at', 'category', 'content_length'])
-        
-        try:
-            print("Fetching homepage to extract article links...")
-            response = requests.get(home_url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse homepage HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find article links on the homepage
-            article_links = []
-            categories = ['bangladesh', 'world', 'economy', 'sports', 'entertainment', 'opinion', 'lifestyle', 'technology']
-            
-            # Look for article cards or links in major categories
-            for category in categories:
-                category_selector = f'a[href*="/{category}/"]'
-                category_links = soup.select(category_selector)
-                
-                for element in category_links:
-                    href = element.get('href')
-                    if href and '/video/' not in href and '/gallery/' not in href and href not in article_links:
-                        # Make sure it's a full URL
-                        if not href.startswith('http'):
-                            href = base_url + href
-                        article_links.append((href, category))
-            
-            # Take unique articles, up to 20
-            seen_urls = set()
-            unique_articles = []
-            for url, category in article_links:
-                if url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_articles.append((url, category))
-                    if len(unique_articles) >= 20:
-                        break
-            
-            print(f"Found {len(unique_articles)} unique article links. Processing...")
-            
-            # Process each article
-            for i, (article_url, category) in enumerate(unique_articles):
-                try:
-                    # Add a random delay to avoid being blocked
-                    time.sleep(random.uniform(3, 5))
-                    
-                    print(f"Fetching article {i+1}/{len(unique_articles)}: {article_url}")
-                    article_response = requests.get(article_url, headers=headers)
-                    article_response.raise_for_status()
-                    
-                    # Parse article HTML
-                    article_soup = BeautifulSoup(article_response.text, 'html.parser')
-                    
-                    # Extract title
-                    title_element = article_soup.select_one('h1')
-                    title = clean_text(title_element.text) if title_element else "No title found"
-                    
-                    # Extract publication date
-                    date_element = article_soup.select_one('time')
-                    published_at = date_element.get('datetime') if date_element else ""
-                    
-                    # Extract main image
-                    image_element = article_soup.select_one('figure img') or article_soup.select_one('.article-image img')
-                    image_url = ""
-                    if image_element:
-                        image_url = image_element.get('src')
-                        if not image_url:
-                            image_url = image_element.get('data-src', '')
-                    
-                    # Multiple strategies to extract full article content
-                    article_content = ""
-                    
-                    # Strategy 1: Look for article content div
-                    content_div = (
-                        article_soup.select_one('div[data-nt="storyPageDetailMainBlock"]') or
-                        article_soup.select_one('div.story-element') or  
-                        article_soup.select_one('article') or 
-                        article_soup.select_one('div[itemprop="articleBody"]')
-                    )
-                    
-                    if content_div:
-                        # Get all paragraphs
-                        paragraphs = content_div.select('p')
-                        for p in paragraphs:
-                            # Skip empty paragraphs
-                            if p.text.strip():
-                                article_content += p.text.strip() + "\n\n"
-                    
-                    # Strategy 2: If we didn't find content, try another approach
-                    if not article_content or len(article_content) < 200:
-                        # Try to find content blocks based on class patterns
-                        content_blocks = article_soup.select('.story-element-text')
-                        if content_blocks:
-                            for block in content_blocks:
-                                article_content += block.get_text(strip=True) + "\n\n"
-                    
-                    # Strategy 3: If still no content, try a broader approach
-                    if not article_content or len(article_content) < 200:
-                        # First try to find an article container
-                        article_container = article_soup.select_one('article') or article_soup.select_one('main')
-                        
-                        if article_container:
-                            # Get all paragraphs within the article container
-                            all_paragraphs = article_container.select('p')
-                            # Filter out navigation, footer, etc. (usually shorter paragraphs)
-                            content_paragraphs = [p.text.strip() for p in all_paragraphs if len(p.text.strip()) > 30]
-                            article_content = "\n\n".join(content_paragraphs)
-                    
-                    # Strategy 4: Last resort, just get all significant paragraphs from the page
-                    if not article_content or len(article_content) < 200:
-                        # Get all paragraphs from the page
-                        all_paragraphs = article_soup.select('p')
-                        # Filter out potentially irrelevant paragraphs
-                        content_paragraphs = [p.text.strip() for p in all_paragraphs 
-                                             if len(p.text.strip()) > 40 
-                                             and 'cookie' not in p.text.lower()
-                                             and 'subscribe' not in p.text.lower()]
-                        article_content = "\n\n".join(content_paragraphs)
-                    
-                    # Clean up the content
-                    article_content = article_content.strip()
-                    content_length = len(article_content)
-                    
-                    if not article_content:
-                        print(f"No content found for article: {article_url}")
-                        article_content = "Content extraction failed"
-                        content_length = 0
-                    
-                    # Write to CSV
-                    writer.writerow([title, article_content, image_url, article_url, published_at, category, content_length])
-                    print(f"Saved article successfully ({content_length} characters)")
-                    
-                    # Save debug HTML for troubleshooting if content is too short
-                    if content_length < 300:
-                        debug_dir = "debug_html"
-                        if not os.path.exists(debug_dir):
-                            os.makedirs(debug_dir)
-                        article_id = article_url.split('/')[-1]
-                        with open(f"{debug_dir}/{article_id}.html", "w", encoding="utf-8") as debug_file:
-                            debug_file.write(article_response.text)
-                        print(f"Saved debug HTML for short article: {article_id}")
-                    
-                except Exception as e:
-                    print(f"Error processing article {article_url}: {e}")
-                    
-        except Exception as e:
-            print(f"Error: {e}")
-    
-    print(f"\nScraping completed. Data saved to '{csv_filename}'")
-    print(f"Check the file to verify full article content was captured.")
+    if backend == "bs4":
+        title, article_content, image_url, published_at = _parse_full_article_bs4(html)
+    else:
+        title, article_content, image_url, published_at = html_extract.extract_full_article(html)
 
-if __name__ == "__main__":
-    scrape_prothom_alo_full_content()import requests
-from bs4 import BeautifulSoup
-import csv
-import time
-import random
-import re
-import os
+    if not article_content:
+        print(f"No content found for article: {article_url}")
+        article_content = "Content extraction failed"
 
-def clean_text(text):
-    """Clean text by removing extra whitespace and newlines"""
-    if not text:
-        return ""
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    return title, article_content, image_url, published_at
+
+def _parse_full_article_bs4(html):
+    """BeautifulSoup implementation of parse_full_article"""
+    # Parse article HTML
+    article_soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract title
+    title_element = article_soup.select_one('h1')
+    title = clean_text(title_element.text) if title_element else "No title found"
+
+    # Extract publication date
+    date_element = article_soup.select_one('time')
+    published_at = date_element.get('datetime') if date_element else ""
+
+    # Extract main image
+    image_element = article_soup.select_one('figure img') or article_soup.select_one('.article-image img')
+    image_url = ""
+    if image_element:
+        image_url = image_element.get('src')
+        if not image_url:
+            image_url = image_element.get('data-src', '')
+
+    # Multiple strategies to extract full article content
+    article_content = ""
+
+    # Strategy 1: Look for article content div
+    content_div = (
+        article_soup.select_one('div[data-nt="storyPageDetailMainBlock"]') or
+        article_soup.select_one('div.story-element') or  
+        article_soup.select_one('article') or 
+        article_soup.select_one('div[itemprop="articleBody"]')
+    )
+
+    if content_div:
+        # Get all paragraphs
+        paragraphs = content_div.select('p')
+        for p in paragraphs:
+            # Skip empty paragraphs
+            if p.text.strip():
+                article_content += p.text.strip() + "\n\n"
+
+    # Strategy 2: If we didn't find content, try another approach
+    if not article_content or len(article_content) < 200:
+        # Try to find content blocks based on class patterns
+        content_blocks = article_soup.select('.story-element-text')
+        if content_blocks:
+            for block in content_blocks:
+                article_content += block.get_text(strip=True) + "\n\n"
+
+    # Strategy 3: If still no content, try a broader approach
+    if not article_content or len(article_content) < 200:
+        # First try to find an article container
+        article_container = article_soup.select_one('article') or article_soup.select_one('main')
+
+        if article_container:
+            # Get all paragraphs within the article container
+            all_paragraphs = article_container.select('p')
+            # Filter out navigation, footer, etc. (usually shorter paragraphs)
+            content_paragraphs = [p.text.strip() for p in all_paragraphs if len(p.text.strip()) > 30]
+            article_content = "\n\n".join(content_paragraphs)
 
-def scrape_prothom_alo_full_content():
+    # Strategy 4: Last resort, just get all significant paragraphs from the page
+    if not article_content or len(article_content) < 200:
+        # Get all paragraphs from the page
+        all_paragraphs = article_soup.select('p')
+        # Filter out potentially irrelevant paragraphs
+        content_paragraphs = [p.text.strip() for p in all_paragraphs 
+                             if len(p.text.strip()) > 40 
+                             and 'cookie' not in p.text.lower()
+                             and 'subscribe' not in p.text.lower()]
+        article_content = "\n\n".join(content_paragraphs)
+
+    # Clean up the content
+    article_content = article_content.strip()
+
+    return title, article_content, image_url, published_at
+
+def parse_fetched_article(article_url, fetched):
+    """
+    Parse stage of the crawl, run in a worker process: turn a fetched
+    (api_fields, html) pair into (fields, debug_html). debug_html is only
+    sent back for short articles, which get saved for troubleshooting.
+    """
+    api_fields, html = fetched
+    if api_fields:
+        return api_fields, None
+    fields = parse_full_article(html, article_url)
+    article_content = fields[1]
+    short = article_content == "Content extraction failed" or len(article_content) < 300
+    return fields, html if short else None
+
+def scrape_prothom_alo_full_content(concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+                                    output_mode="upsert", recrawl_after=None, use_api=True, parse_workers=None,
+                                    discovery="sitemap", since=None, max_articles=20, category_quotas=None,
+                                    store_format="jsonl"):
     """
     Scrape latest news articles from Prothom Alo with enhanced content extraction
-    to ensure full article text is captured
+    to ensure full article text is captured. Rows also carry the category and
+    content length, and short extractions leave their HTML in debug_html/.
     """
     print("Starting to scrape complete news articles from Prothom Alo...")
     
-    # Headers to mimic a browser
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache"
-    }
-    
-    # Base URL and homepage URL
-    base_url = "https://www.prothomalo.com"
-    home_url = base_url
+    # Output CSV; it also scopes this scraper's entries in the crawl state
+    csv_filename = 'prothom_alo_full_articles.csv'
+
+    # Incremental runs only fetch articles the crawl state has not seen yet
+    incremental = output_mode != "overwrite"
+    state = CrawlState(scope=csv_filename)
+    store = article_store.open_store(store_format, source="full_artecel_1")
     
     # Create CSV file for storing data
-    csv_filename = 'prothom_alo_full_articles.csv'
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['title', 'full_content', 'image_url', 'article_url', 'published_at', 'category', 'content_length'])
+    header = ['title', 'full_content', 'image_url', 'article_url', 'published_at', 'category', 'content_length']
+    with csv_output.open_csv(csv_filename, header, mode=output_mode, key_column='article_url') as writer:
+        # A new CSV (first run, or the old one was moved aside) has none of the
+        # stories in the crawl state, so this run fetches everything again
+        incremental = incremental and not writer.fresh
         
         try:
-            print("Fetching homepage to extract article links...")
-            response = requests.get(home_url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse homepage HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Rank the discovered articles that are new, edited or due for a recrawl
+            frontier = build_frontier(discover_article_links(discovery, since=since), state,
+                                      incremental=incremental, recrawl_after=recrawl_after, quotas=category_quotas)
             
-            # Find article links on the homepage
-            article_links = []
-            categories = ['bangladesh', 'world', 'economy', 'sports', 'entertainment', 'opinion', 'lifestyle', 'technology']
-            
-            # Look for article cards or links in major categories
-            for category in categories:
-                category_selector = f'a[href*="/{category}/"]'
-                category_links = soup.select(category_selector)
-                
-                for element in category_links:
-                    href = element.get('href')
-                    if href and '/video/' not in href and '/gallery/' not in href and href not in article_links:
-                        # Make sure it's a full URL
-                        if not href.startswith('http'):
-                            href = base_url + href
-                        article_links.append((href, category))
-            
-            # Take unique articles, up to 20
-            seen_urls = set()
-            unique_articles = []
-            for url, category in article_links:
-                if url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_articles.append((url, category))
-                    if len(unique_articles) >= 20:
-                        break
+            # Spend the crawl budget on the most valuable articles first
+            unique_articles = [(url, category) for url, category, _, _ in frontier.take(max_articles)]
             
             print(f"Found {len(unique_articles)} unique article links. Processing...")
             
-            # Process each article
-            for i, (article_url, category) in enumerate(unique_articles):
-                try:
-                    # Add a random delay to avoid being blocked
-                    time.sleep(random.uniform(3, 5))
-                    
-                    print(f"Fetching article {i+1}/{len(unique_articles)}: {article_url}")
-                    article_response = requests.get(article_url, headers=headers)
-                    article_response.raise_for_status()
-                    
-                    # Parse article HTML
-                    article_soup = BeautifulSoup(article_response.text, 'html.parser')
-                    
-                    # Extract title
-                    title_element = article_soup.select_one('h1')
-                    title = clean_text(title_element.text) if title_element else "No title found"
-                    
-                    # Extract publication date
-                    date_element = article_soup.select_one('time')
-                    published_at = date_element.get('datetime') if date_element else ""
-                    
-                    # Extract main image
-                    image_element = article_soup.select_one('figure img') or article_soup.select_one('.article-image img')
-                    image_url = ""
-                    if image_element:
-                        image_url = image_element.get('src')
-                        if not image_url:
-                            image_url = image_element.get('data-src', '')
-                    
-                    # Multiple strategies to extract full article content
-                    article_content = ""
-                    
-                    # Strategy 1: Look for article content div
-                    content_div = (
-                        article_soup.select_one('div[data-nt="storyPageDetailMainBlock"]') or
-                        article_soup.select_one('div.story-element') or  
-                        article_soup.select_one('article') or 
-                        article_soup.select_one('div[itemprop="articleBody"]')
-                    )
-                    
-                    if content_div:
-                        # Get all paragraphs
-                        paragraphs = content_div.select('p')
-                        for p in paragraphs:
-                            # Skip empty paragraphs
-                            if p.text.strip():
-                                article_content += p.text.strip() + "\n\n"
-                    
-                    # Strategy 2: If we didn't find content, try another approach
-                    if not article_content or len(article_content) < 200:
-                        # Try to find content blocks based on class patterns
-                        content_blocks = article_soup.select('.story-element-text')
-                        if content_blocks:
-                            for block in content_blocks:
-                                article_content += block.get_text(strip=True) + "\n\n"
-                    
-                    # Strategy 3: If still no content, try a broader approach
-                    if not article_content or len(article_content) < 200:
-                        # First try to find an article container
-                        article_container = article_soup.select_one('article') or article_soup.select_one('main')
-                        
-                        if article_container:
-                            # Get all paragraphs within the article container
-                            all_paragraphs = article_container.select('p')
-                            # Filter out navigation, footer, etc. (usually shorter paragraphs)
-                            content_paragraphs = [p.text.strip() for p in all_paragraphs if len(p.text.strip()) > 30]
-                            article_content = "\n\n".join(content_paragraphs)
-                    
-                    # Strategy 4: Last resort, just get all significant paragraphs from the page
-                    if not article_content or len(article_content) < 200:
-                        # Get all paragraphs from the page
-                        all_paragraphs = article_soup.select('p')
-                        # Filter out potentially irrelevant paragraphs
-                        content_paragraphs = [p.text.strip() for p in all_paragraphs 
-                                             if len(p.text.strip()) > 40 
-                                             and 'cookie' not in p.text.lower()
-                                             and 'subscribe' not in p.text.lower()]
-                        article_content = "\n\n".join(content_paragraphs)
-                    
-                    # Clean up the content
-                    article_content = article_content.strip()
-                    content_length = len(article_content)
-                    
-                    if not article_content:
-                        print(f"No content found for article: {article_url}")
-                        article_content = "Content extraction failed"
-                        content_length = 0
-                    
-                    # Write to CSV
-                    writer.writerow([title, article_content, image_url, article_url, published_at, category, content_length])
-                    print(f"Saved article successfully ({content_length} characters)")
-                    
-                    # Save debug HTML for troubleshooting if content is too short
-                    if content_length < 300:
-                        debug_dir = "debug_html"
-                        if not os.path.exists(debug_dir):
-                            os.makedirs(debug_dir)
-                        article_id = article_url.split('/')[-1]
-                        with open(f"{debug_dir}/{article_id}.html", "w", encoding="utf-8") as debug_file:
-                            debug_file.write(article_response.text)
-                        print(f"Saved debug HTML for short article: {article_id}")
-                    
-                except Exception as e:
-                    print(f"Error processing article {article_url}: {e}")
+            # Fetch articles concurrently; fetched pages are parsed in worker processes
+            # and written as they arrive.
+            # The story API is tried first, the HTML page is only downloaded when it fails.
+            def fetch_article(article_url):
+                story = fetch_story_by_url(article_url) if use_api else None
+                if story:
+                    fields = story_fields(story)
+                    if fields[1]:
+                        return fields, None
+                article_response = http_cache.cached_get(article_url)
+                article_response.raise_for_status()
+                return None, article_response.text
+
+            def save_article(article_url, job, parsed):
+                index, category = job
+                (title, article_content, image_url, published_at), debug_html = parsed
+                print(f"Fetched article {index+1}/{len(unique_articles)}: {article_url}")
+                content_length = len(article_content) if article_content != "Content extraction failed" else 0
+                # Failed extractions are not recorded, so the next run retries them
+                status = "new"
+                if content_length:
+                    status = state.record(article_url, article_url, content_hash(title, article_content, image_url),
+                                          published_at=published_at)
+                if incremental and status == "unchanged":
+                    print(f"Article unchanged since last run: {article_url}")
+                    return
+                
+                # Write to CSV
+                writer.writerow([title, article_content, image_url, article_url, published_at, category, content_length])
+                if store is not None:
+                    store.append({"title": title, "full_content": article_content, "image_url": image_url,
+                                  "article_url": article_url, "published_at": published_at,
+                                  "category": category, "content_length": content_length})
+                print(f"Saved article successfully ({content_length} characters)")
+                
+                # Save debug HTML for troubleshooting if content is too short
+                if debug_html is not None and content_length < 300:
+                    debug_dir = "debug_html"
+                    if not os.path.exists(debug_dir):
+                        os.makedirs(debug_dir)
+                    article_id = article_url.split('/')[-1]
+                    with open(f"{debug_dir}/{article_id}.html", "w", encoding="utf-8") as debug_file:
+                        debug_file.write(debug_html)
+                    print(f"Saved debug HTML for short article: {article_id}")
+
+            jobs = [(article_url, (i, category)) for i, (article_url, category) in enumerate(unique_articles)]
+            crawl(jobs, fetch_article, save_article, concurrency=concurrency, rate_per_host=rate_per_host,
+                  parse=parse_fetched_article, parse_workers=parse_workers)
                     
         except Exception as e:
             print(f"Error: {e}")
     
+    state.close()
+    if store is not None:
+        store.close()
     print(f"\nScraping completed. Data saved to '{csv_filename}'")
+    http_cache.print_cache_stats()
     print(f"Check the file to verify full article content was captured.")
 
 if __name__ == "__main__":
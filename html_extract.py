@@ -0,0 +1,403 @@
+import re
+import sys
+import time
+
+# lxml is a C parser; when it is not installed the scrapers keep using their
+# BeautifulSoup code path
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+BACKENDS = ("lxml", "bs4")
+DEFAULT_BACKEND = "lxml" if HAVE_LXML else "bs4"
+
+# Content containers tried by the full-article strategies, in priority order.
+# Like select_one(), only the first matching element of each kind is used.
+_CONTAINERS = ("main_block", "story_element", "article", "item_body", "main")
+
+
+def clean_text(text):
+    """Clean text by removing extra whitespace and newlines"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def _classes(element):
+    return (element.get('class') or '').split()
+
+
+def _container_kind(element, classes):
+    """Return which content container kinds an element is (it may be several)"""
+    kinds = []
+    tag = element.tag
+    if tag == 'div':
+        if element.get('data-nt') == 'storyPageDetailMainBlock':
+            kinds.append("main_block")
+        if 'story-element' in classes:
+            kinds.append("story_element")
+        if element.get('itemprop') == 'articleBody':
+            kinds.append("item_body")
+    elif tag == 'article':
+        kinds.append("article")
+    elif tag == 'main':
+        kinds.append("main")
+    return kinds
+
+
+def _image_url(img):
+    image_url = img.get('src')
+    if not image_url:
+        image_url = img.get('data-src', '')
+    return image_url
+
+
+def collect_candidates(html):
+    """
+    Walk the parsed page once and collect every candidate the scrapers look
+    at: title, date, images, story-element texts and the paragraphs of each
+    content container. Each paragraph's text is computed a single time.
+    """
+    root = lxml.html.fromstring(html)
+    candidates = {
+        "title": None,
+        "published_at": "",
+        "figure_image": None,
+        "article_image": None,
+        "story_texts": [],
+        "story_content_paragraphs": [],
+        "paragraphs": [],
+        "containers": {kind: None for kind in _CONTAINERS},
+    }
+    # For each container kind: the first matching element while we are inside
+    # it, then 'done' once it has been closed
+    open_containers = {kind: None for kind in _CONTAINERS}
+    figure_depth = 0
+    article_image_depth = 0
+    story_content_depth = 0
+    time_seen = False
+
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+        classes = _classes(element)
+
+        if event == "end":
+            if tag == 'figure':
+                figure_depth -= 1
+            if 'article-image' in classes:
+                article_image_depth -= 1
+            if 'storyContent' in classes:
+                story_content_depth -= 1
+            for kind, current in open_containers.items():
+                if current is element:
+                    open_containers[kind] = "done"
+            continue
+
+        if tag == 'figure':
+            figure_depth += 1
+        if 'article-image' in classes:
+            article_image_depth += 1
+        if 'storyContent' in classes:
+            story_content_depth += 1
+        for kind in _container_kind(element, classes):
+            if open_containers[kind] is None:
+                open_containers[kind] = element
+                candidates["containers"][kind] = []
+
+        if tag == 'h1' and candidates["title"] is None:
+            candidates["title"] = clean_text(element.text_content())
+        elif tag == 'time' and not time_seen:
+            time_seen = True
+            candidates["published_at"] = element.get('datetime') or ""
+        elif tag == 'img':
+            if figure_depth > 0 and candidates["figure_image"] is None:
+                candidates["figure_image"] = _image_url(element)
+            if article_image_depth > 0 and candidates["article_image"] is None:
+                candidates["article_image"] = _image_url(element)
+        elif tag == 'p':
+            text = element.text_content().strip()
+            candidates["paragraphs"].append(text)
+            for kind, current in open_containers.items():
+                if current is not None and current != "done":
+                    candidates["containers"][kind].append(text)
+            if story_content_depth > 0:
+                candidates["story_content_paragraphs"].append(
+                    ''.join(piece.strip() for piece in element.itertext()))
+
+        if 'story-element-text' in classes:
+            candidates["story_texts"].append(''.join(piece.strip() for piece in element.itertext()))
+
+    return candidates
+
+
+class _StoryTarget:
+    """
+    lxml parser target for the restricted parsing mode. Instead of building a
+    DOM it follows the SAX event stream and keeps only h1, time, figure and
+    article-image images, story-element* blocks, .storyContent paragraphs and
+    the paragraphs of the storyPageDetailMainBlock / div.story-element
+    containers. Navigation, ads, related-story rails and scripts are dropped
+    as they stream past.
+    """
+
+    def __init__(self):
+        self.candidates = {
+            "title": None,
+            "published_at": "",
+            "figure_image": None,
+            "article_image": None,
+            "story_texts": [],
+            "story_content_paragraphs": [],
+            "paragraphs": [],
+            "containers": {kind: None for kind in _CONTAINERS},
+        }
+        self.stack = []
+        self.open_containers = []
+        self.title_parts = None
+        self.time_seen = False
+        self.figure_depth = 0
+        self.article_image_depth = 0
+        self.story_content_depth = 0
+        self.paragraph_buffers = []
+        self.story_buffers = []
+        self.pending = []
+
+    def _flush(self):
+        # A text node may arrive in several data() calls; stripping is applied
+        # per whole node, like BeautifulSoup's get_text(strip=True)
+        if not self.pending:
+            return
+        stripped = "".join(self.pending).strip()
+        self.pending = []
+        for _, stripped_pieces, _, _ in self.paragraph_buffers:
+            stripped_pieces.append(stripped)
+        for pieces in self.story_buffers:
+            pieces.append(stripped)
+
+    def start(self, tag, attrib):
+        self._flush()
+        classes = (attrib.get('class') or '').split()
+        actions = []
+        c = self.candidates
+
+        if tag == 'h1' and c["title"] is None and self.title_parts is None:
+            self.title_parts = []
+            actions.append("h1")
+        elif tag == 'time' and not self.time_seen:
+            self.time_seen = True
+            c["published_at"] = attrib.get('datetime') or ""
+        elif tag == 'img':
+            image_url = attrib.get('src') or attrib.get('data-src', '')
+            if self.figure_depth > 0 and c["figure_image"] is None:
+                c["figure_image"] = image_url
+            if self.article_image_depth > 0 and c["article_image"] is None:
+                c["article_image"] = image_url
+
+        if tag == 'figure':
+            self.figure_depth += 1
+            actions.append("figure")
+        if 'article-image' in classes:
+            self.article_image_depth += 1
+            actions.append("article_image")
+        if 'storyContent' in classes:
+            self.story_content_depth += 1
+            actions.append("story_content")
+        if tag == 'div':
+            kinds = []
+            if attrib.get('data-nt') == 'storyPageDetailMainBlock':
+                kinds.append("main_block")
+            if 'story-element' in classes:
+                kinds.append("story_element")
+            for kind in kinds:
+                if c["containers"][kind] is None:
+                    c["containers"][kind] = []
+                    self.open_containers.append(kind)
+                    actions.append(("container", kind))
+        if tag == 'p' and (self.open_containers or self.story_content_depth > 0):
+            self.paragraph_buffers.append(([], [], list(self.open_containers), self.story_content_depth > 0))
+            actions.append("p")
+        if 'story-element-text' in classes:
+            self.story_buffers.append([])
+            actions.append("story_text")
+
+        self.stack.append((tag, actions))
+
+    def end(self, tag):
+        self._flush()
+        # Pop up to the matching start tag, closing anything left implicitly open
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, actions = self.stack.pop()
+            for action in reversed(actions):
+                self._close(action)
+            if open_tag == tag:
+                return
+
+    def _close(self, action):
+        c = self.candidates
+        if action == "h1":
+            c["title"] = clean_text("".join(self.title_parts))
+            self.title_parts = None
+        elif action == "figure":
+            self.figure_depth -= 1
+        elif action == "article_image":
+            self.article_image_depth -= 1
+        elif action == "story_content":
+            self.story_content_depth -= 1
+        elif action == "p":
+            pieces, stripped_pieces, containers, in_story_content = self.paragraph_buffers.pop()
+            text = "".join(pieces).strip()
+            for kind in containers:
+                c["containers"][kind].append(text)
+            if in_story_content:
+                c["story_content_paragraphs"].append("".join(stripped_pieces))
+        elif action == "story_text":
+            c["story_texts"].append("".join(self.story_buffers.pop()))
+        else:
+            self.open_containers.remove(action[1])
+
+    def data(self, text):
+        if self.title_parts is not None:
+            self.title_parts.append(text)
+        for pieces, _, _, _ in self.paragraph_buffers:
+            pieces.append(text)
+        self.pending.append(text)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        while self.stack:
+            _, actions = self.stack.pop()
+            for action in reversed(actions):
+                self._close(action)
+        return self.candidates
+
+
+# Size of the chunks fed to the streaming parser
+_FEED_CHUNK = 64 * 1024
+
+
+def collect_story_candidates(html):
+    """
+    Restricted counterpart of collect_candidates: streams the page through an
+    lxml SAX target and returns the same candidate dict, with only the story
+    containers filled in (no article/main containers, no page-wide paragraphs)
+    """
+    parser = etree.HTMLParser(target=_StoryTarget())
+    for offset in range(0, len(html), _FEED_CHUNK):
+        parser.feed(html[offset:offset + _FEED_CHUNK])
+    return parser.close()
+
+
+def _full_article_from_candidates(c, partial=False):
+    title = c["title"] if c["title"] is not None else "No title found"
+    image_url = c["figure_image"] if c["figure_image"] is not None else (c["article_image"] or "")
+    containers = c["containers"]
+
+    # Strategy 1: first content container found, its non-empty paragraphs
+    article_content = ""
+    found_container = None
+    for kind in ("main_block", "story_element", "article", "item_body"):
+        if containers[kind] is not None:
+            found_container = kind
+            article_content = "".join(text + "\n\n" for text in containers[kind] if text)
+            break
+
+    # Strategy 2: story-element-text blocks
+    if len(article_content) < 200:
+        article_content += "".join(text + "\n\n" for text in c["story_texts"])
+
+    # The restricted parse only holds the story containers; anything needing
+    # the broader strategies has to be parsed in full
+    if partial and (found_container is None or len(article_content) < 200):
+        return None
+
+    # Strategy 3: longer paragraphs of the article (or main) container
+    if len(article_content) < 200:
+        paragraphs = containers["article"] if containers["article"] is not None else containers["main"]
+        if paragraphs is not None:
+            article_content = "\n\n".join(text for text in paragraphs if len(text) > 30)
+
+    # Strategy 4: every significant paragraph on the page
+    if len(article_content) < 200:
+        article_content = "\n\n".join(text for text in c["paragraphs"]
+                                      if len(text) > 40
+                                      and 'cookie' not in text.lower()
+                                      and 'subscribe' not in text.lower())
+
+    return title, article_content.strip(), image_url, c["published_at"]
+
+
+def extract_full_article(html, partial=True):
+    """
+    Same fields and strategy order as full_artecel_1.parse_full_article, from
+    one traversal: returns (title, content, image_url, published_at).
+    With `partial`, the page is first parsed in the restricted streaming mode;
+    the full DOM is only built when the story containers do not hold enough text.
+    """
+    if partial:
+        result = _full_article_from_candidates(collect_story_candidates(html), partial=True)
+        if result is not None:
+            return result
+    return _full_article_from_candidates(collect_candidates(html))
+
+
+def extract_story_elements(html, partial=True):
+    """
+    Same fields as content_main.parse_story_elements, from one traversal:
+    returns (title, content, image_url, published_at, used_fallback).
+    Everything it needs is kept by the restricted mode, so with `partial`
+    the full DOM is never built.
+    """
+    c = collect_story_candidates(html) if partial else collect_candidates(html)
+    title = c["title"] if c["title"] is not None else "No title found"
+    image_url = c["figure_image"] or ""
+    article_content = "".join(text + "\n\n" for text in c["story_texts"] if text).strip()
+    used_fallback = False
+    if not article_content and c["story_content_paragraphs"]:
+        article_content = "".join(text + "\n\n" for text in c["story_content_paragraphs"]).strip()
+        used_fallback = True
+    return title, article_content, image_url, c["published_at"], used_fallback
+
+
+def benchmark(paths, repeat=5):
+    """Compare the lxml extractor with the BeautifulSoup path on saved pages"""
+    from full_artecel_1 import parse_full_article
+
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as html_file:
+            pages.append(html_file.read())
+    print(f"Benchmarking {len(pages)} pages x {repeat} runs...")
+
+    timings = {}
+    results = {}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results[backend] = [parse_full_article(page, path, backend=backend) for page, path in zip(pages, paths)]
+        timings[backend] = (time.perf_counter() - start) / (repeat * len(pages))
+        print(f"{backend}: {timings[backend] * 1000:.2f} ms/page")
+
+    mismatches = [path for path, a, b in zip(paths, results["lxml"], results["bs4"]) if a != b]
+    print(f"Speedup: {timings['bs4'] / timings['lxml']:.1f}x, {len(mismatches)} pages with different output")
+    for path in mismatches:
+        print(f"  differs: {path}")
+
+
+if __name__ == "__main__":
+    if not HAVE_LXML:
+        print("lxml is not installed")
+    elif len(sys.argv) < 2:
+        print("Usage: python html_extract.py debug_html/*.html")
+    else:
+        benchmark(sys.argv[1:])
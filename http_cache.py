@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+import http_session
+
+# Directory holding one body file and one metadata file per cached URL
+CACHE_DIR = "http_cache"
+
+# Headers that describe the transfer rather than the stored (decoded) body
+_TRANSFER_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+_stats = {"fetched": 0, "revalidated": 0, "bytes_fetched": 0, "bytes_from_cache": 0}
+_stats_lock = threading.Lock()
+
+
+def _entry_paths(url, cache_dir):
+    """Return the (body, metadata) file paths for a URL"""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    entry_dir = os.path.join(cache_dir, key[:2])
+    return os.path.join(entry_dir, key + ".body"), os.path.join(entry_dir, key + ".json")
+
+
+def _load_entry(url, cache_dir):
+    """Return (metadata, body) for a cached URL, or (None, None) if it is not cached"""
+    body_path, meta_path = _entry_paths(url, cache_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        with open(body_path, "rb") as body_file:
+            body = body_file.read()
+    except (OSError, ValueError):
+        return None, None
+    return meta, body
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _store_entry(url, response, cache_dir):
+    """Persist a 200 response body together with its validators"""
+    body_path, meta_path = _entry_paths(url, cache_dir)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    headers = {name: value for name, value in response.headers.items()
+               if name.lower() not in _TRANSFER_HEADERS}
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "encoding": response.encoding,
+        "headers": headers,
+    }
+    # Body first, so a metadata file never points at a missing body
+    _write_atomic(body_path, response.content)
+    _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+def _response_from_entry(url, meta, body):
+    """Build a requests Response equivalent to the original 200 from a cache entry"""
+    response = Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    response.encoding = meta.get("encoding")
+    response._content = body
+    response.from_cache = True
+    return response
+
+
+def cached_get(url, kind="html", cache_dir=CACHE_DIR, **kwargs):
+    """
+    GET a URL through the shared session, revalidating any cached copy with
+    If-None-Match / If-Modified-Since. A 304 is answered from disk, so an
+    unchanged page or story costs only the headers.
+    """
+    meta, body = _load_entry(url, cache_dir)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = http_session.get(url, kind=kind, headers=headers, **kwargs)
+
+    if response.status_code == 304 and meta:
+        with _stats_lock:
+            _stats["revalidated"] += 1
+            _stats["bytes_from_cache"] += len(body)
+        return _response_from_entry(url, meta, body)
+
+    response.from_cache = False
+    if response.status_code == 200:
+        with _stats_lock:
+            _stats["fetched"] += 1
+            _stats["bytes_fetched"] += len(response.content)
+        # Only responses carrying a validator can be revalidated later
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            _store_entry(url, response, cache_dir)
+    return response
+
+
+def cache_stats():
+    """Return a copy of the fetch/revalidation counters for this process"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def print_cache_stats():
+    stats = cache_stats()
+    print(f"HTTP cache: {stats['fetched']} fetched ({stats['bytes_fetched']} bytes), "
+          f"{stats['revalidated']} unchanged (304, {stats['bytes_from_cache']} bytes served from disk)")
@@ -0,0 +1,89 @@
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+import rate_limiter
+
+# Brotli is only decoded by urllib3 when a brotli package is installed, so only
+# advertise it when we can actually read it
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+BASE_URL = "https://www.prothomalo.com"
+
+# Single header profile shared by every crawler
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# Accept headers for the two kinds of resources we fetch
+ACCEPT_HEADERS = {
+    "html": {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    },
+    "json": {
+        "Accept": "application/json, text/plain, */*",
+        "Referer": BASE_URL + "/",
+        "Origin": BASE_URL,
+    },
+}
+
+# Connection pool size per host; should be at least the crawl concurrency
+POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """
+    Return the shared keep-alive session for the URL's host, creating it on
+    first use. Sessions are pooled so concurrent crawler threads reuse open
+    TCP+TLS connections instead of opening one per request.
+    """
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _sessions[host] = session
+    return session
+
+
+def get(url, kind="html", headers=None, timeout=DEFAULT_TIMEOUT, max_retries=rate_limiter.MAX_RETRIES, **kwargs):
+    """
+    GET a URL over the shared session for its host with the header profile
+    for `kind` ('html' or 'json'). Requests are paced by the shared adaptive
+    per-host rate limiter; 429/5xx responses, timeouts and connection errors
+    are retried up to `max_retries` times with backoff, honoring Retry-After.
+    """
+    request_headers = dict(ACCEPT_HEADERS[kind])
+    if headers:
+        request_headers.update(headers)
+    session = get_session(url)
+    return rate_limiter.send_with_retries(
+        lambda: session.get(url, headers=request_headers, timeout=timeout, **kwargs), url,
+        max_retries=max_retries, retry_exceptions=(requests.Timeout, requests.ConnectionError))
+
+
+def close_sessions():
+    """Close every pooled session (e.g. at the end of a run)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
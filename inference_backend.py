@@ -0,0 +1,264 @@
+import importlib.util
+import io
+import os
+import sys
+import time
+from importlib.machinery import SourceFileLoader
+from types import SimpleNamespace
+import numpy as np
+import torch
+from model_registry import (get_model, is_loaded, unload, load_bert, load_mbart, load_bert_tokenizer,
+                            load_mbart_tokenizer, BERT_MODEL_NAME, MBART_MODEL_NAME)
+
+# 'fp32' is plain PyTorch eager inference, 'int8' applies dynamic int8
+# quantization to the Linear layers, 'onnx' runs an exported ONNX Runtime graph
+BACKENDS = ("fp32", "int8", "onnx")
+DEFAULT_BACKEND = "fp32"
+
+# Directory for exported ONNX graphs
+ONNX_DIR = "onnx_models"
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+
+def _quantize(model):
+    """Dynamically quantize the Linear layers of a model to int8 (weights int8, activations quantized on the fly)"""
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return quantized
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime session with the calling convention of a Hugging Face BERT
+    encoder, so get_sentence_embeddings can use it in place of the model
+    """
+
+    def __init__(self, path, config):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.config = config
+        self.path = path
+
+    def __call__(self, input_ids, attention_mask, token_type_ids=None, **kwargs):
+        feeds = {"input_ids": input_ids.numpy(), "attention_mask": attention_mask.numpy()}
+        if "token_type_ids" in self.input_names:
+            if token_type_ids is None:
+                token_type_ids = torch.zeros_like(input_ids)
+            feeds["token_type_ids"] = token_type_ids.numpy()
+        last_hidden_state = self.session.run(["last_hidden_state"], feeds)[0]
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(last_hidden_state))
+
+
+def _bert_onnx_path(model_name, onnx_dir=ONNX_DIR):
+    return os.path.join(onnx_dir, model_name.replace("/", "_") + ".onnx")
+
+
+def export_bert_onnx(model_name=BERT_MODEL_NAME, onnx_dir=ONNX_DIR):
+    """Export the BERT encoder to ONNX (once) and return the file path"""
+    path = _bert_onnx_path(model_name, onnx_dir)
+    if os.path.exists(path):
+        return path
+    os.makedirs(onnx_dir, exist_ok=True)
+    tokenizer, model = load_bert(model_name)
+    sample = tokenizer(["নমুনা বাক্য", "আরেকটি নমুনা বাক্য"], return_tensors="pt", padding=True)
+    print(f"Exporting {model_name} to {path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+    return path
+
+
+def _from_fp32(key, load_fp32, derive):
+    """
+    Build a derived model from the fp32 one, then drop the fp32 model from the
+    registry unless something had loaded it before, so the process does not
+    keep both sets of weights
+    """
+    was_loaded = is_loaded(key)
+    tokenizer, model = load_fp32()
+    derived = derive(model)
+    if not was_loaded:
+        unload(key)
+    return tokenizer, derived
+
+
+def load_bert_backend(backend=DEFAULT_BACKEND, model_name=BERT_MODEL_NAME):
+    """Return the shared (tokenizer, model) pair for BERT on the given inference backend"""
+    _check_backend(backend)
+    if backend == "fp32":
+        return load_bert(model_name)
+    if backend == "int8":
+        return get_model(("bert", model_name, "int8"),
+                         lambda: _from_fp32(("bert", model_name), lambda: load_bert(model_name), _quantize))
+
+    def loader():
+        # With the graph already exported only the tokenizer and config are needed
+        from transformers import AutoConfig
+        if not os.path.exists(_bert_onnx_path(model_name)):
+            _from_fp32(("bert", model_name), lambda: load_bert(model_name), lambda model: export_bert_onnx(model_name))
+        return load_bert_tokenizer(model_name), OnnxEncoder(_bert_onnx_path(model_name),
+                                                            AutoConfig.from_pretrained(model_name))
+    return get_model(("bert", model_name, "onnx"), loader)
+
+
+def load_mbart_backend(backend=DEFAULT_BACKEND, model_name=MBART_MODEL_NAME):
+    """Return the shared (tokenizer, model) pair for mBART on the given inference backend"""
+    _check_backend(backend)
+    if backend == "fp32":
+        return load_mbart(model_name)
+    if backend == "int8":
+        return get_model(("mbart", model_name, "int8"),
+                         lambda: _from_fp32(("mbart", model_name), lambda: load_mbart(model_name), _quantize))
+
+    def loader():
+        # Encoder-decoder generation needs the exported decoder-with-past graphs, which optimum builds
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise ImportError("The 'onnx' backend for mBART requires optimum[onnxruntime]")
+        # optimum exports from the checkpoint itself, so the PyTorch model is never loaded here
+        tokenizer = load_mbart_tokenizer(model_name)
+        export_dir = os.path.join(ONNX_DIR, model_name.replace("/", "_"))
+        if os.path.isdir(export_dir):
+            return tokenizer, ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+        ort_model.save_pretrained(export_dir)
+        return tokenizer, ort_model
+    return get_model(("mbart", model_name, "onnx"), loader)
+
+
+def backend_model_key(model_name, backend):
+    """Model identifier to use for caches, since backends give slightly different outputs"""
+    return model_name if backend == "fp32" else f"{model_name}:{backend}"
+
+
+def load_transformer_summarizer():
+    """Import the mBART summarizer script, which has no .py extension, as a module"""
+    module = sys.modules.get("news_summarization_with_transformer_models")
+    if module is None:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_Summarization_with_Transformer_Models")
+        loader = SourceFileLoader("news_summarization_with_transformer_models", script)
+        module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+        loader.exec_module(module)
+        sys.modules[loader.name] = module
+    return module
+
+
+def model_size_bytes(model):
+    """Serialized size of a model: the ONNX file(s) or the PyTorch state dict"""
+    if isinstance(model, OnnxEncoder):
+        return os.path.getsize(model.path)
+    if not isinstance(model, torch.nn.Module):
+        model_dir = getattr(model, "model_save_dir", None)
+        if model_dir and os.path.isdir(model_dir):
+            return sum(os.path.getsize(os.path.join(model_dir, name)) for name in os.listdir(model_dir)
+                       if name.endswith(".onnx") or name.endswith(".onnx_data"))
+        return 0
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def _overlap_f1(reference, candidate):
+    """Unigram overlap F1 between two summaries (a ROUGE-1 style agreement score)"""
+    reference_tokens = reference.split()
+    candidate_tokens = candidate.split()
+    if not reference_tokens or not candidate_tokens:
+        return float(reference_tokens == candidate_tokens)
+    remaining = {}
+    for token in reference_tokens:
+        remaining[token] = remaining.get(token, 0) + 1
+    common = 0
+    for token in candidate_tokens:
+        if remaining.get(token, 0) > 0:
+            common += 1
+            remaining[token] -= 1
+    if common == 0:
+        return 0.0
+    precision = common / len(candidate_tokens)
+    recall = common / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _report(name, backend, fp32_seconds, seconds, fp32_size, size, agreement_name, agreement):
+    report = {
+        "backend": backend,
+        "speedup": fp32_seconds / seconds if seconds else float("inf"),
+        "fp32_seconds": fp32_seconds,
+        "seconds": seconds,
+        "fp32_size_mb": fp32_size / 2**20,
+        "size_mb": size / 2**20,
+        "memory_saving": 1 - size / fp32_size if fp32_size else 0.0,
+        agreement_name: agreement,
+    }
+    print(f"{name} [{backend}] speedup {report['speedup']:.2f}x, "
+          f"model {report['size_mb']:.0f} MB vs {report['fp32_size_mb']:.0f} MB "
+          f"({report['memory_saving']:.0%} smaller), {agreement_name} {agreement:.4f}")
+    return report
+
+
+def validate_bert_backend(backend, sentences, batch_size=32):
+    """
+    Embed `sentences` with fp32 and with `backend`; report the speedup, the
+    model size saving and the mean cosine similarity to the fp32 embeddings
+    """
+    from ragg_summarize import get_sentence_embeddings
+
+    tokenizer, fp32_model = load_bert_backend("fp32")
+    _, model = load_bert_backend(backend)
+
+    start = time.perf_counter()
+    reference = get_sentence_embeddings(sentences, fp32_model, tokenizer, batch_size=batch_size)
+    fp32_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidate = get_sentence_embeddings(sentences, model, tokenizer, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosine = float(np.mean(np.sum(reference * candidate, axis=1) / np.maximum(norms, 1e-12)))
+    return _report("BERT", backend, fp32_seconds, seconds, model_size_bytes(fp32_model),
+                   model_size_bytes(model), "mean_cosine", cosine)
+
+
+def validate_mbart_backend(backend, texts, batch_size=4, num_beams=4, max_length=150):
+    """
+    Summarize `texts` with fp32 and with `backend`; report the speedup, the
+    model size saving and the mean unigram overlap with the fp32 summaries
+    """
+    summarizer = load_transformer_summarizer()
+
+    tokenizer, fp32_model = load_mbart_backend("fp32")
+    _, model = load_mbart_backend(backend)
+
+    def run(summary_model):
+        start = time.perf_counter()
+        summaries = summarizer.summarize_many_with_transformer(
+            texts, max_length=max_length, batch_size=batch_size, num_beams=num_beams,
+            model=summary_model, tokenizer=tokenizer)
+        return summaries, time.perf_counter() - start
+
+    reference, fp32_seconds = run(fp32_model)
+    candidate, seconds = run(model)
+    overlap = float(np.mean([_overlap_f1(r, c) for r, c in zip(reference, candidate)])) if texts else 1.0
+    return _report("mBART", backend, fp32_seconds, seconds, model_size_bytes(fp32_model),
+                   model_size_bytes(model), "summary_overlap", overlap)
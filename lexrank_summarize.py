@@ -0,0 +1,213 @@
+import csv
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from bengali_text import clean_text, split_into_sentences, tokenize
+from csv_stream import stream_summaries, DEFAULT_CHUNK_SIZE
+from summary_cache import SummaryCache
+import article_store
+
+# Cosine similarity below which two sentences are not linked in the graph
+DEFAULT_THRESHOLD = 0.1
+# Probability of following a similarity edge rather than jumping to a random sentence
+DEFAULT_DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# Very common function words that say nothing about what a sentence is about
+STOPWORDS = frozenset("""
+ও এবং এ এই এর এটি এটা এক একটি এখন এমন কিন্তু কি কী কে কোন কোনো করে করা করেন
+করেছে করেছেন করতে হয় হয়ে হয়েছে হয়েছিল হবে হতে ছিল ছিলেন থেকে তার তাঁর তিনি তারা
+তাদের তা যে যা যার জন্য না নয় নি দিয়ে দিকে পর পরে মধ্যে সঙ্গে সাথে আর আরও বা বলে
+বলেন বলেছেন হলে হলেও শুধু সব সেই সে এসব ওই উপর নিয়ে যখন তখন যদি তবে তো
+""".split())
+
+
+def build_tfidf(sentences):
+    """
+    Return an L2-normalized sparse TF-IDF matrix with one row per sentence.
+    Term frequency is sublinear (1 + log tf); document frequency is counted
+    over all the given sentences, so IDF reflects the whole corpus.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            if token in STOPWORDS:
+                continue
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+
+    shape = (len(sentences), max(len(vocabulary), 1))
+    # Duplicate (row, col) pairs are summed, giving raw term counts
+    counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+    counts.sum_duplicates()
+
+    document_frequency = np.bincount(counts.indices, minlength=shape[1])
+    idf = np.log((1 + shape[0]) / (1 + document_frequency)).astype(np.float32) + 1
+    counts.data = (1 + np.log(counts.data)) * idf[counts.indices]
+
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ counts
+
+
+def lexrank_scores(tfidf, threshold=DEFAULT_THRESHOLD, damping=DEFAULT_DAMPING):
+    """
+    LexRank centrality of the sentences (rows) of one article: power
+    iteration over the sparse graph linking sentences whose cosine
+    similarity is at least `threshold`
+    """
+    n = tfidf.shape[0]
+    similarity = (tfidf @ tfidf.T).tocsr()
+    similarity.data[similarity.data < threshold] = 0
+    similarity.eliminate_zeros()
+
+    # Row-normalize into a transition matrix; every sentence links to itself, so no row is empty
+    degree = np.asarray(similarity.sum(axis=1)).ravel()
+    degree[degree == 0] = 1
+    transition = (sparse.diags(1 / degree) @ similarity).T.tocsr()
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - damping) / n + damping * (transition @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize_many_with_lexrank(texts, num_sentences=5, threshold=DEFAULT_THRESHOLD, damping=DEFAULT_DAMPING,
+                                summary_cache=None, idf_scope="batch"):
+    """
+    Summarize several Bengali articles by LexRank sentence centrality over
+    TF-IDF vectors. IDF comes from all sentences of the batch
+    (idf_scope='batch') or from each article alone ('article'); each article
+    is ranked on its own similarity graph. With a summary cache IDF is always
+    per article, so a cached summary does not depend on the batch the article
+    came in. Output has the same shape as summarize_many_with_rag.
+    """
+    if summary_cache is not None:
+        return summary_cache.summarize(
+            texts, "lexrank", None, {"num_sentences": num_sentences, "threshold": threshold, "damping": damping,
+                                     "idf_scope": "article"},
+            lambda missing: summarize_many_with_lexrank(missing, num_sentences=num_sentences, threshold=threshold,
+                                                        damping=damping, idf_scope="article"))
+
+    summaries = [""] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or len(text.strip()) == 0:
+            continue
+        text = clean_text(text)
+        sentences = split_into_sentences(text)
+        if len(sentences) <= num_sentences:
+            summaries[i] = text
+        else:
+            pending.append((i, sentences))
+
+    if not pending:
+        return summaries
+
+    if idf_scope == "batch":
+        tfidf = build_tfidf([sentence for _, sentences in pending for sentence in sentences])
+    offset = 0
+    for i, sentences in pending:
+        if idf_scope == "batch":
+            article_tfidf = tfidf[offset:offset + len(sentences)]
+        else:
+            article_tfidf = build_tfidf(sentences)
+        scores = lexrank_scores(article_tfidf, threshold=threshold, damping=damping)
+        offset += len(sentences)
+
+        # Stable sort so ties go to the earlier sentence, then restore original order
+        top_indices = sorted(np.argsort(-scores, kind="stable")[:num_sentences])
+        summaries[i] = '। '.join(sentences[j] for j in top_indices) + '।'
+
+    return summaries
+
+
+def summarize_bengali_with_lexrank(text, num_sentences=5, threshold=DEFAULT_THRESHOLD, damping=DEFAULT_DAMPING,
+                                   summary_cache=None):
+    """
+    Summarize Bengali text without a model: the `num_sentences` most central
+    sentences by LexRank over TF-IDF, in original order
+    """
+    return summarize_many_with_lexrank([text], num_sentences=num_sentences, threshold=threshold,
+                                       damping=damping, summary_cache=summary_cache)[0]
+
+
+def process_csv_with_lexrank_summaries(num_sentences=3, streaming=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                                       from_store=False):
+    """
+    Read the CSV with Bengali articles, summarize every article with LexRank
+    and save to a new CSV file. `num_sentences` sets the summary length.
+    """
+    if streaming and from_store:
+        # Streaming resumes by row position in the CSV, which the store does not have
+        raise ValueError("streaming reads the CSV and cannot be combined with from_store")
+
+    # Input and output files
+    input_csv = 'prothom_alo_full_content.csv'
+    output_csv = 'prothom_alo_with_lexrank_summaries.csv'
+
+    # Articles summarized on earlier runs with unchanged text are not recomputed
+    summary_cache = SummaryCache()
+
+    try:
+        if streaming:
+            total = stream_summaries(
+                input_csv, output_csv,
+                lambda texts: summarize_many_with_lexrank(texts, num_sentences=num_sentences,
+                                                          summary_cache=summary_cache),
+                'lexrank_summary', chunk_size=chunk_size)
+            summary_cache.print_stats()
+            print(f"\nProcessing complete. Check {output_csv} for results.")
+            print(f"Total articles processed: {total}")
+            return
+
+        # Read the articles
+        if from_store:
+            print(f"Reading articles from the article store: {article_store.STORE_DIR}")
+            df = article_store.read_articles(columns=['title', 'full_content', 'article_url'])
+        else:
+            print(f"Reading CSV file: {input_csv}")
+            df = pd.read_csv(input_csv)
+
+        # Check if the required column exists
+        if 'full_content' not in df.columns:
+            print("Error: 'full_content' column not found in the CSV.")
+            return
+
+        # No model to load, so the whole file is summarized rather than a sample
+        print(f"Creating LexRank summaries for {len(df)} articles...")
+        start = time.perf_counter()
+        df['lexrank_summary'] = summarize_many_with_lexrank(df['full_content'].tolist(), num_sentences=num_sentences,
+                                                            summary_cache=summary_cache)
+        print(f"Summarized {len(df)} articles in {time.perf_counter() - start:.2f}s")
+        summary_cache.print_stats()
+
+        # Save to a new CSV file
+        print(f"Saving results to: {output_csv}")
+        df.to_csv(output_csv, index=False, quoting=csv.QUOTE_ALL)
+
+        # Display some examples
+        print("\nSample summaries:")
+        for i, row in df.head(3).iterrows():
+            title = row['title'] if 'title' in df.columns else 'N/A'
+            summary = row['lexrank_summary']
+            print(f"\nTitle: {title}")
+            print(f"Summary ({len(summary.split())} words): {summary}")
+
+        print(f"\nProcessing complete. Check {output_csv} for results.")
+        print(f"Total articles processed: {len(df)}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        summary_cache.close()
+
+
+if __name__ == "__main__":
+    process_csv_with_lexrank_summaries()
@@ -0,0 +1,81 @@
+import threading
+import time
+
+# Models used by the summarizers
+BERT_MODEL_NAME = "bert-base-multilingual-cased"  # Supports Bengali
+MBART_MODEL_NAME = "facebook/mbart-large-50-many-to-many-mmt"
+
+_models = {}
+# Re-entrant, since one loader may build on another model (e.g. a quantized copy)
+_lock = threading.RLock()
+
+
+def _describe(key):
+    """Model name for the load log, with the backend for derived keys such as (kind, name, 'int8')"""
+    if not isinstance(key, tuple) or len(key) < 2:
+        return str(key)
+    return key[1] if len(key) == 2 else f"{key[1]} [{', '.join(str(part) for part in key[2:])}]"
+
+
+def get_model(key, loader):
+    """
+    Return the object produced by `loader()` for `key`, calling the loader only
+    the first time the key is requested in this process. Later calls get the
+    same warm instance.
+    """
+    with _lock:
+        if key not in _models:
+            print(f"Loading {_describe(key)} (once per process)...")
+            start = time.perf_counter()
+            _models[key] = loader()
+            print(f"Loaded in {time.perf_counter() - start:.1f}s")
+        return _models[key]
+
+
+def is_loaded(key):
+    """True if `key` is currently held by the registry"""
+    with _lock:
+        return key in _models
+
+
+def load_bert_tokenizer(model_name=BERT_MODEL_NAME):
+    """Load a BERT tokenizer on its own, for backends that do not need the PyTorch weights"""
+    from transformers import BertTokenizer
+    return BertTokenizer.from_pretrained(model_name)
+
+
+def load_mbart_tokenizer(model_name=MBART_MODEL_NAME, src_lang="bn_IN"):
+    """Load the mBART-50 tokenizer (its language codes include bn_IN) with the source language set"""
+    from transformers import MBart50TokenizerFast
+    return MBart50TokenizerFast.from_pretrained(model_name, src_lang=src_lang)
+
+
+def load_bert(model_name=BERT_MODEL_NAME):
+    """Return the shared (tokenizer, model) pair for a BERT encoder, in eval mode"""
+    def loader():
+        from transformers import BertModel
+        tokenizer = load_bert_tokenizer(model_name)
+        model = BertModel.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
+    return get_model(("bert", model_name), loader)
+
+
+def load_mbart(model_name=MBART_MODEL_NAME, src_lang="bn_IN"):
+    """Return the shared (tokenizer, model) pair for mBART, in eval mode with the source language set"""
+    def loader():
+        from transformers import MBartForConditionalGeneration
+        tokenizer = load_mbart_tokenizer(model_name, src_lang)
+        model = MBartForConditionalGeneration.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
+    return get_model(("mbart", model_name), loader)
+
+
+def unload(key=None):
+    """Drop one cached model (or all of them) so its memory can be reclaimed"""
+    with _lock:
+        if key is None:
+            _models.clear()
+        else:
+            _models.pop(key, None)
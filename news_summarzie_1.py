@@ -1,6 +1,9 @@
 import pandas as pd
 import csv
 import re
+from csv_stream import stream_summaries, DEFAULT_CHUNK_SIZE
+from summary_cache import SummaryCache
+import article_store
 
 def clean_text(text):
     """Clean text by removing extra whitespace and newlines"""
@@ -33,19 +36,43 @@ def summarize_bengali_text(text, max_words=60):
     # Add ellipsis to indicate truncation
     return summary.strip() + '...'
 
-def process_csv_with_summaries():
+def process_csv_with_summaries(streaming=False, chunk_size=DEFAULT_CHUNK_SIZE, from_store=False):
     """
     Read the CSV with Bengali articles, create summaries of up to 60 words,
-    and save to a new CSV file.
+    and save to a new CSV file. Truncation needs no model, so every row is summarized.
     """
+    if streaming and from_store:
+        # Streaming resumes by row position in the CSV, which the store does not have
+        raise ValueError("streaming reads the CSV and cannot be combined with from_store")
+
     # Input and output files
     input_csv = 'prothom_alo_full_content.csv'
     output_csv = 'prothom_alo_with_summaries.csv'
     
+    # Articles summarized on earlier runs with unchanged text are not recomputed
+    summary_cache = SummaryCache()
+    
+    def summarize_texts(texts):
+        # Empty cells come back from pandas as NaN
+        return summary_cache.summarize(
+            texts, "truncate", None, {"max_words": 60},
+            lambda missing: [summarize_bengali_text(t if isinstance(t, str) else "", 60) for t in missing])
+    
     try:
-        # Read the CSV file
-        print(f"Reading CSV file: {input_csv}")
-        df = pd.read_csv(input_csv)
+        if streaming:
+            total = stream_summaries(input_csv, output_csv, summarize_texts, 'summary_60words', chunk_size=chunk_size)
+            summary_cache.print_stats()
+            print(f"\nProcessing complete. Check {output_csv} for results.")
+            print(f"Total articles processed: {total}")
+            return
+        
+        # Read the articles
+        if from_store:
+            print(f"Reading articles from the article store: {article_store.STORE_DIR}")
+            df = article_store.read_articles(columns=['title', 'full_content', 'article_url'])
+        else:
+            print(f"Reading CSV file: {input_csv}")
+            df = pd.read_csv(input_csv)
         
         # Check if the required column exists
         if 'full_content' not in df.columns:
@@ -54,7 +81,8 @@ def process_csv_with_summaries():
         
         # Add a new column with summaries
         print("Creating 60-word summaries...")
-        df['summary_60words'] = df['full_content'].apply(lambda x: summarize_bengali_text(x, 60))
+        df['summary_60words'] = summarize_texts(df['full_content'].tolist())
+        summary_cache.print_stats()
         
         # Save to a new CSV file
         print(f"Saving results to: {output_csv}")
@@ -73,6 +101,8 @@ def process_csv_with_summaries():
         
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        summary_cache.close()
 
 if __name__ == "__main__":
     process_csv_with_summaries()
@@ -0,0 +1,204 @@
+import html
+import re
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import http_cache
+import http_session
+
+API_BASE = http_session.BASE_URL + "/api/v1"
+
+# Collection behind the "latest news" listing
+LATEST_COLLECTION_ID = 43749
+DEFAULT_PAGE_SIZE = 50
+
+
+def collection_api_url(collection_id, offset=0, limit=DEFAULT_PAGE_SIZE):
+    return f"{API_BASE}/collections/{collection_id}?offset={offset}&limit={limit}"
+
+
+def story_api_url(story_id):
+    return f"{API_BASE}/stories/{story_id}"
+
+
+def _to_millis(value):
+    """Convert a datetime or epoch-seconds cutoff to the API's epoch milliseconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp() * 1000
+    return float(value) * 1000
+
+
+def item_published_at(item):
+    """Return the publish time (epoch ms) of a collection item, if the payload carries one"""
+    story = item.get('story') or {}
+    return story.get('published-at') or story.get('first-published-at') or story.get('last-published-at')
+
+
+def item_article_url(item):
+    """Return the article page URL of a collection item (built from its story slug), or ''"""
+    slug = (item.get('story') or {}).get('slug')
+    return f"{http_session.BASE_URL}/{slug.strip('/')}" if slug else ""
+
+
+def iter_collection_items(collection_id=LATEST_COLLECTION_ID, page_size=DEFAULT_PAGE_SIZE,
+                          max_items=None, since=None):
+    """
+    Yield the items of a collection one at a time, walking `offset` page by
+    page. Stops when the collection is exhausted, after `max_items` items, or
+    at the first item published before `since` (a datetime or epoch seconds;
+    collections are ordered newest first). Only one page is held in memory.
+    """
+    since_ms = _to_millis(since)
+    offset = 0
+    yielded = 0
+    while True:
+        page_url = collection_api_url(collection_id, offset=offset, limit=page_size)
+        print(f"Fetching collection page (offset {offset})...")
+        response = http_cache.cached_get(page_url, kind="json")
+        response.raise_for_status()
+        items = response.json().get('items') or []
+        if not items:
+            return
+
+        for item in items:
+            published_at = item_published_at(item)
+            if since_ms is not None and published_at and published_at < since_ms:
+                return
+            yield item
+            yielded += 1
+            if max_items is not None and yielded >= max_items:
+                return
+
+        if len(items) < page_size:
+            return
+        offset += len(items)
+
+
+# CDN serving the S3 keys referenced by story and collection payloads
+IMAGE_CDN = "https://images.prothomalo.com/"
+
+
+def _story_elements(article_data):
+    """Story elements of a story, either top level or spread over its cards"""
+    if 'story-elements' in article_data:
+        return article_data['story-elements']
+    elements = []
+    for card in article_data.get('cards') or []:
+        elements.extend(card.get('story-elements') or [])
+    return elements
+
+
+def parse_story(article_data):
+    """Extract (full_article, image_url) from a story payload (story API or collection item)"""
+    # The story endpoint may wrap the story in a {"story": {...}} envelope
+    if isinstance(article_data.get('story'), dict):
+        article_data = article_data['story']
+
+    # Extract full article content
+    full_article = ""
+    image_url = ""
+
+    # Get main image first
+    if 'hero-image' in article_data:
+        hero_image = article_data['hero-image']
+        if 'hero-image-s3-url' in hero_image:
+            image_url = hero_image['hero-image-s3-url']
+        elif 'hero-image-url' in hero_image:
+            image_url = hero_image['hero-image-url']
+    elif article_data.get('hero-image-s3-key'):
+        image_url = IMAGE_CDN + article_data['hero-image-s3-key']
+
+    # Extract article body
+    for element in _story_elements(article_data):
+        if element.get('type') == 'text':
+            if 'content' in element:
+                full_article += element['content'] + " "
+        # Get first image URL if we don't have one yet
+        elif element.get('type') == 'image' and not image_url:
+            if 'image-s3-url' in element:
+                image_url = element['image-s3-url']
+            elif 'src' in element:
+                image_url = element['src']
+            elif element.get('image-s3-key'):
+                image_url = IMAGE_CDN + element['image-s3-key']
+
+    # Clean up article text
+    return full_article.strip(), image_url
+
+
+def item_headline(item):
+    """Headline of a collection item, from the item card or the embedded story"""
+    if 'item' in item and 'headline' in item['item']:
+        headline = item['item']['headline']
+        return " ".join(headline) if isinstance(headline, list) else headline
+    return (item.get('story') or {}).get('headline', "")
+
+
+def story_from_collection_item(item):
+    """
+    Return (full_article, image_url) straight from the story embedded in a
+    collection item. full_article is empty when the collection payload does
+    not carry the body, in which case the story endpoint has to be fetched.
+    """
+    story = item.get('story') or {}
+    full_article, image_url = parse_story(story)
+    if not image_url and item.get('item', {}).get('hero-image-s3-key'):
+        image_url = IMAGE_CDN + item['item']['hero-image-s3-key']
+    return full_article, image_url
+
+
+def story_by_slug_api_url(article_url):
+    """Story API URL resolving an article page URL (its path is the story slug)"""
+    slug = urlparse(article_url).path.strip('/')
+    return f"{API_BASE}/stories-by-slug?slug={slug}"
+
+
+def fetch_story_by_url(article_url):
+    """
+    Resolve an article page URL to its story JSON through the story API.
+    Returns None when the API does not know the URL or the request fails,
+    so callers can fall back to scraping the HTML page.
+    """
+    try:
+        response = http_cache.cached_get(story_by_slug_api_url(article_url), kind="json")
+        if response.status_code != 200:
+            return None
+        data = response.json()
+    except Exception as e:
+        print(f"Story API lookup failed for {article_url}: {e}")
+        return None
+    story = data.get('story') if isinstance(data.get('story'), dict) else data
+    return story if story.get('id') else None
+
+
+def _text_paragraphs(content):
+    """Split the HTML of a text story element into plain-text paragraphs"""
+    paragraphs = []
+    for block in re.split(r'</p>|<br\s*/?>', content):
+        text = html.unescape(re.sub(r'<[^>]+>', ' ', block))
+        text = re.sub(r'\s+', ' ', text).strip()
+        if text:
+            paragraphs.append(text)
+    return paragraphs
+
+
+def story_fields(story):
+    """
+    Return (title, content, image_url, published_at) for a story payload in
+    the same shape the HTML scrapers produce: paragraphs separated by blank
+    lines and an ISO 8601 publication time
+    """
+    paragraphs = []
+    for element in _story_elements(story):
+        if element.get('type') == 'text' and element.get('content'):
+            paragraphs.extend(_text_paragraphs(element['content']))
+    _, image_url = parse_story(story)
+
+    published_at = ""
+    published_ms = story.get('published-at') or story.get('first-published-at')
+    if published_ms:
+        published_at = datetime.fromtimestamp(published_ms / 1000, tz=timezone.utc).isoformat()
+
+    title = re.sub(r'\s+', ' ', story.get('headline') or "").strip()
+    return title, "\n\n".join(paragraphs), image_url, published_at
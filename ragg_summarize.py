@@ -1,72 +1,115 @@
 import pandas as pd
 import torch
-from transformers import pipeline, BertTokenizer, BertModel
+from model_registry import BERT_MODEL_NAME
+from inference_backend import load_bert_backend, backend_model_key, DEFAULT_BACKEND
+from embedding_cache import EmbeddingCache
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import csv
-import re
+from bengali_text import clean_text, split_into_sentences, pack_windows
+from csv_stream import stream_summaries, DEFAULT_CHUNK_SIZE
+from summary_cache import SummaryCache
+import article_store
 
-def clean_text(text):
-    """Clean text by removing extra whitespace and newlines"""
-    if not text:
-        return ""
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+# Number of sentences encoded per BERT forward pass
+DEFAULT_BATCH_SIZE = 32
 
-def get_sentence_embeddings(sentences, model, tokenizer):
-    """Get embeddings for a list of sentences using BERT"""
-    embeddings = []
-    
-    for sentence in sentences:
-        # Tokenize and convert to tensor
-        inputs = tokenizer(sentence, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        
-        # Get embeddings
-        with torch.no_grad():
-            outputs = model(**inputs)
-        
-        # Use CLS token as sentence embedding
-        embedding = outputs.last_hidden_state[:, 0, :].numpy()
-        embeddings.append(embedding[0])
-    
-    return np.array(embeddings)
+# BERT input limit, leaving room for [CLS] and [SEP]
+MAX_SENTENCE_TOKENS = 510
 
-def split_into_sentences(text):
-    """Split Bengali text into sentences"""
-    # Simple rule-based sentence splitting for Bengali
-    # This is a basic implementation and might need improvement
-    sentences = re.split(r'[।!?]', text)
-    return [s.strip() for s in sentences if s.strip()]
+def split_long_sentences(sentences, tokenizer, max_tokens=MAX_SENTENCE_TOKENS):
+    """
+    Split sentences longer than `max_tokens` at word boundaries into pieces
+    that fit BERT. Returns (pieces, owners), where owners[k] is the index of
+    the sentence pieces[k] came from.
+    """
+    pieces = []
+    owners = []
+    for i, sentence in enumerate(sentences):
+        # A WordPiece token covers at least one character, so short sentences cannot be too long
+        if len(sentence) > max_tokens:
+            words = sentence.split()
+            lengths = [len(ids) for ids in tokenizer(words, add_special_tokens=False)["input_ids"]]
+            if sum(lengths) + len(lengths) > max_tokens:
+                for window in pack_windows(words, lengths, max_tokens):
+                    pieces.append(" ".join(window))
+                    owners.append(i)
+                continue
+        pieces.append(sentence)
+        owners.append(i)
+    return pieces, owners
 
-def summarize_bengali_with_rag(text, num_sentences=5):
+def get_sentence_embeddings(sentences, model, tokenizer, batch_size=DEFAULT_BATCH_SIZE, cache=None):
     """
-    Summarize Bengali text using a RAG-inspired approach:
-    1. Split text into sentences
-    2. Get sentence embeddings
-    3. Calculate sentence importance based on centrality
-    4. Select top sentences maintaining original order
+    Get embeddings for a list of sentences using BERT. Sentences are sorted by
+    length and encoded in padded batches of `batch_size`, so each batch pads
+    to a similar length; embeddings are returned in the original order.
+    Sentences over MAX_SENTENCE_TOKENS get the mean embedding of their
+    pieces instead of being truncated.
+    With an EmbeddingCache, only sentences it has never seen are encoded.
     """
-    if not text or len(text.strip()) == 0:
-        return ""
+    if cache is not None:
+        embeddings, missing = cache.lookup(sentences)
+        if missing:
+            # Encode each distinct missing sentence once
+            unique_missing = list(dict.fromkeys(sentences[i] for i in missing))
+            new_embeddings = get_sentence_embeddings(unique_missing, model, tokenizer, batch_size=batch_size)
+            cache.store(unique_missing, new_embeddings)
+            by_sentence = dict(zip(unique_missing, new_embeddings))
+            for i in missing:
+                embeddings[i] = by_sentence[sentences[i]]
+        return embeddings
     
-    # Clean text
-    text = clean_text(text)
+    embeddings = np.zeros((len(sentences), model.config.hidden_size), dtype=np.float32)
+    if not sentences:
+        return embeddings
     
-    # Split into sentences
-    sentences = split_into_sentences(text)
+    # Sentences too long for one pass are embedded piece by piece in the same
+    # batches as the rest, and their piece embeddings averaged
+    pieces, owners = split_long_sentences(sentences, tokenizer)
+    if len(pieces) > len(sentences):
+        piece_embeddings = get_sentence_embeddings(pieces, model, tokenizer, batch_size=batch_size)
+        np.add.at(embeddings, owners, piece_embeddings)
+        embeddings /= np.bincount(owners, minlength=len(sentences))[:, None]
+        return embeddings
     
-    # If text is already short, return as is
-    if len(sentences) <= num_sentences:
-        return text
+    # Bucket by length so short sentences are not padded up to long ones
+    order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
     
-    # Load model and tokenizer - using multilingual BERT
-    model_name = "bert-base-multilingual-cased"  # Supports Bengali
-    tokenizer = BertTokenizer.from_pretrained(model_name)
-    model = BertModel.from_pretrained(model_name)
+    for start in range(0, len(order), batch_size):
+        batch_indices = order[start:start + batch_size]
+        batch = [sentences[i] for i in batch_indices]
+        
+        # Tokenize with padding; the attention mask keeps padding out of the encoding
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        
+        # Get embeddings
+        with torch.no_grad():
+            outputs = model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"],
+                            token_type_ids=inputs.get("token_type_ids"))
+        
+        # Use CLS token (position 0, padding is on the right) as sentence embedding
+        embeddings[batch_indices] = outputs.last_hidden_state[:, 0, :].numpy()
     
-    # Get sentence embeddings
-    embeddings = get_sentence_embeddings(sentences, model, tokenizer)
+    return embeddings
+
+def get_article_embeddings(sentence_lists, model, tokenizer, batch_size=DEFAULT_BATCH_SIZE, cache=None):
+    """
+    Embed the sentences of many articles in shared batches and return one
+    embedding matrix per article
+    """
+    all_sentences = [sentence for sentences in sentence_lists for sentence in sentences]
+    embeddings = get_sentence_embeddings(all_sentences, model, tokenizer, batch_size=batch_size, cache=cache)
     
+    per_article = []
+    offset = 0
+    for sentences in sentence_lists:
+        per_article.append(embeddings[offset:offset + len(sentences)])
+        offset += len(sentences)
+    return per_article
+
+def select_central_sentences(sentences, embeddings, num_sentences):
+    """Pick the `num_sentences` most central sentences and join them in original order"""
     # Calculate sentence centrality (similarity to other sentences)
     similarity_matrix = cosine_similarity(embeddings)
     centrality_scores = np.sum(similarity_matrix, axis=1)
@@ -83,19 +126,113 @@ def summarize_bengali_with_rag(text, num_sentences=5):
     
     return summary
 
-def process_csv_with_rag_summaries():
+def summarize_bengali_with_rag(text, num_sentences=5, model=None, tokenizer=None, batch_size=DEFAULT_BATCH_SIZE,
+                               cache=None, backend=DEFAULT_BACKEND, summary_cache=None):
+    """
+    Summarize Bengali text using a RAG-inspired approach:
+    1. Split text into sentences
+    2. Get sentence embeddings
+    3. Calculate sentence importance based on centrality
+    4. Select top sentences maintaining original order
+
+    The BERT model is loaded once per process through model_registry, on the
+    given inference backend ('fp32', 'int8' or 'onnx'), unless a model and
+    tokenizer are passed in.
+    """
+    return summarize_many_with_rag([text], num_sentences=num_sentences, model=model, tokenizer=tokenizer,
+                                   batch_size=batch_size, cache=cache, backend=backend,
+                                   summary_cache=summary_cache)[0]
+
+def summarize_many_with_rag(texts, num_sentences=5, model=None, tokenizer=None, batch_size=DEFAULT_BATCH_SIZE,
+                            cache=None, backend=DEFAULT_BACKEND, summary_cache=None):
+    """
+    Summarize several articles at once; the sentences of all articles that
+    need the model are embedded together in length-sorted batches. With a
+    SummaryCache, only articles whose text was not summarized before with
+    the same backend and `num_sentences` are computed.
+    """
+    if summary_cache is not None:
+        return summary_cache.summarize(
+            texts, "rag", backend_model_key(BERT_MODEL_NAME, backend), {"num_sentences": num_sentences},
+            lambda missing: summarize_many_with_rag(missing, num_sentences=num_sentences, model=model,
+                                                    tokenizer=tokenizer, batch_size=batch_size, cache=cache,
+                                                    backend=backend))
+    
+    summaries = [""] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or len(text.strip()) == 0:
+            continue
+        
+        # Clean text
+        text = clean_text(text)
+        
+        # Split into sentences
+        sentences = split_into_sentences(text)
+        
+        # If text is already short, return as is
+        if len(sentences) <= num_sentences:
+            summaries[i] = text
+        else:
+            pending.append((i, sentences))
+    
+    if not pending:
+        return summaries
+    
+    # Get the shared model and tokenizer - using multilingual BERT
+    if model is None or tokenizer is None:
+        tokenizer, model = load_bert_backend(backend, BERT_MODEL_NAME)
+    
+    # Get sentence embeddings for all pending articles in shared batches
+    embeddings = get_article_embeddings([sentences for _, sentences in pending], model, tokenizer,
+                                        batch_size=batch_size, cache=cache)
+    
+    for (i, sentences), article_embeddings in zip(pending, embeddings):
+        summaries[i] = select_central_sentences(sentences, article_embeddings, num_sentences)
+    
+    return summaries
+
+def process_csv_with_rag_summaries(backend=DEFAULT_BACKEND, streaming=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                                   from_store=False):
     """
     Read the CSV with Bengali articles, create summaries using RAG approach,
-    and save to a new CSV file.
+    and save to a new CSV file. `backend` picks fp32, int8 or ONNX BERT.
     """
+    if streaming and from_store:
+        # Streaming resumes by row position in the CSV, which the store does not have
+        raise ValueError("streaming reads the CSV and cannot be combined with from_store")
+
     # Input and output files
     input_csv = 'prothom_alo_full_content.csv'
     output_csv = 'prothom_alo_with_rag_summaries.csv'
     
     try:
-        # Read the CSV file
-        print(f"Reading CSV file: {input_csv}")
-        df = pd.read_csv(input_csv)
+        if streaming:
+            tokenizer, model = load_bert_backend(backend, BERT_MODEL_NAME)
+            cache = EmbeddingCache(backend_model_key(BERT_MODEL_NAME, backend), model.config.hidden_size)
+            summary_cache = SummaryCache()
+            try:
+                total = stream_summaries(
+                    input_csv, output_csv,
+                    lambda texts: summarize_many_with_rag(texts, num_sentences=3, model=model, tokenizer=tokenizer,
+                                                          cache=cache, backend=backend,
+                                                          summary_cache=summary_cache),
+                    'rag_summary', chunk_size=chunk_size)
+            finally:
+                cache.close()
+                summary_cache.print_stats()
+                summary_cache.close()
+            print(f"\nProcessing complete. Check {output_csv} for results.")
+            print(f"Total articles processed: {total}")
+            return
+        
+        # Read the articles
+        if from_store:
+            print(f"Reading articles from the article store: {article_store.STORE_DIR}")
+            df = article_store.read_articles(columns=['title', 'full_content', 'article_url'])
+        else:
+            print(f"Reading CSV file: {input_csv}")
+            df = pd.read_csv(input_csv)
         
         # Check if the required column exists
         if 'full_content' not in df.columns:
@@ -105,13 +242,22 @@ def process_csv_with_rag_summaries():
         # Process a sample for demonstration
         sample_size = min(20, len(df))  # Process first 20 or all if fewer
         
-        # Create summaries for the sample
+        # Load the model once and reuse it for every article
+        tokenizer, model = load_bert_backend(backend, BERT_MODEL_NAME)
+        
+        # Sentences embedded on earlier runs are read back from disk
+        cache = EmbeddingCache(backend_model_key(BERT_MODEL_NAME, backend), model.config.hidden_size)
+        # Articles summarized on earlier runs with unchanged text are not recomputed
+        summary_cache = SummaryCache()
+        
+        # Create summaries for the sample, embedding sentences across articles in shared batches
         print(f"Creating RAG-based summaries for {sample_size} articles...")
-        summaries = []
-        for i, row in df.head(sample_size).iterrows():
-            print(f"Processing article {i+1}/{sample_size}...")
-            summary = summarize_bengali_with_rag(row['full_content'], num_sentences=3)
-            summaries.append(summary)
+        summaries = summarize_many_with_rag(df.head(sample_size)['full_content'].tolist(), num_sentences=3,
+                                            model=model, tokenizer=tokenizer, cache=cache, backend=backend,
+                                            summary_cache=summary_cache)
+        cache.close()
+        summary_cache.print_stats()
+        summary_cache.close()
             
         # Add summaries to the dataframe
         df_sample = df.head(sample_size).copy()
@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Requests per second a host starts at, and the bounds the rate adapts within
+INITIAL_RATE = 2.0
+MIN_RATE = 0.2
+MAX_RATE = 10.0
+# Requests a host may receive back to back before the rate applies
+BURST = 2
+
+# AIMD: each fast success adds ADDITIVE_INCREASE / rate, so the rate grows by
+# about ADDITIVE_INCREASE requests/s per second of traffic; an overload signal
+# multiplies it by MULTIPLICATIVE_DECREASE, at most once per DECREASE_COOLDOWN
+ADDITIVE_INCREASE = 0.2
+MULTIPLICATIVE_DECREASE = 0.5
+DECREASE_COOLDOWN = 2.0
+# Responses slower than this (seconds) do not count towards ramping up
+SLOW_RESPONSE = 2.0
+
+# Statuses that mean "try again later" rather than "this URL is bad"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _HostState:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = BURST
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host token bucket whose refill rate adapts (AIMD): it ramps up while
+    responses come back fast and 2xx/304, halves on 429, 5xx or timeouts,
+    and stops all requests to a host until a Retry-After delay has passed.
+    Thread-safe; acquire() blocks the calling thread until its slot.
+    """
+
+    def __init__(self, initial_rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = _HostState(min(self.max_rate, max(self.min_rate, self.initial_rate)))
+        return state
+
+    def acquire(self, url):
+        """Take a token for the URL's host, sleeping until one is available"""
+        host = urlparse(url).netloc
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            state.tokens = min(BURST, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            # Tokens go negative for reservations further in the future
+            state.tokens -= 1
+            wait = -state.tokens / state.rate if state.tokens < 0 else 0.0
+            wait = max(wait, state.blocked_until - now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url, status=None, elapsed=None, error=None, retry_after=None):
+        """Feed the outcome of a request back: an HTTP status, or an exception for timeouts/connection errors"""
+        host = urlparse(url).netloc
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            if error is not None or status in RETRY_STATUSES:
+                if now - state.last_decrease >= DECREASE_COOLDOWN:
+                    state.rate = max(self.min_rate, state.rate * MULTIPLICATIVE_DECREASE)
+                    state.last_decrease = now
+                    print(f"Slowing down {host} to {state.rate:.2f} requests/s "
+                          f"({error.__class__.__name__ if error is not None else status})")
+            elif status is not None and status < 400 and (elapsed is None or elapsed < SLOW_RESPONSE):
+                state.rate = min(self.max_rate, state.rate + ADDITIVE_INCREASE / state.rate)
+
+    def rate(self, url):
+        """Current request rate allowed for the URL's host"""
+        with self.lock:
+            return self._state(urlparse(url).netloc).rate
+
+    def configure(self, initial_rate=None, min_rate=None, max_rate=None):
+        """Change the limits; hosts already seen keep their learned rate within the new bounds"""
+        with self.lock:
+            if initial_rate is not None:
+                self.initial_rate = initial_rate
+            if min_rate is not None:
+                self.min_rate = min_rate
+            if max_rate is not None:
+                self.max_rate = max_rate
+            for state in self.hosts.values():
+                state.rate = min(self.max_rate, max(self.min_rate, state.rate))
+
+
+# Shared by every request made through http_session
+limiter = AdaptiveRateLimiter()
+
+
+def send_with_retries(send, url, max_retries=MAX_RETRIES, retry_exceptions=(), rate_limiter=None):
+    """
+    Call `send()` (one HTTP request for `url`) under the rate limiter,
+    retrying 429/5xx responses and `retry_exceptions` with jittered
+    exponential backoff, or after Retry-After when the server sends one.
+    Returns the last response (which may still be an error status) or
+    re-raises the last exception once the retries are used up.
+    """
+    rate_limiter = rate_limiter or limiter
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            response = send()
+        except retry_exceptions as e:
+            rate_limiter.record(url, error=e)
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"{e.__class__.__name__} for {url}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code in RETRY_STATUSES:
+            rate_limiter.record(url, status=response.status_code, retry_after=retry_after)
+            if attempt == max_retries:
+                return response
+            # The limiter holds further requests to the host until Retry-After has passed
+            delay = backoff_delay(attempt) if retry_after is None else 0.0
+            print(f"HTTP {response.status_code} for {url}, retry {attempt + 1}/{max_retries}"
+                  + (f" after {retry_after:.1f}s (Retry-After)" if retry_after is not None else f" in {delay:.1f}s"))
+            response.close()
+            time.sleep(delay)
+            continue
+
+        rate_limiter.record(url, status=response.status_code, elapsed=time.monotonic() - start)
+        return response
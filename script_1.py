@@ -1,115 +1,200 @@
 
-import requests
-import json
-import csv
 import time
-import random
-from datetime import datetime
+from datetime import datetime, timezone
+import http_cache
+import csv_output
+import article_store
+from crawl_state import CrawlState, content_hash
+from crawl_engine import crawl, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST
+from prothom_alo_api import (iter_collection_items, story_api_url, parse_story, item_headline,
+                             item_article_url, item_published_at, story_from_collection_item,
+                             LATEST_COLLECTION_ID, DEFAULT_PAGE_SIZE)
 
-def scrape_prothom_alo_latest():
+# Output CSV; it also scopes this scraper's entries in the crawl state
+CSV_FILENAME = 'prothom_alo_latest.csv'
+
+# Watch mode: stories looked at per poll, and the bounds of the adaptive poll interval (seconds)
+POLL_ITEMS = 20
+MIN_POLL_INTERVAL = 15
+MAX_POLL_INTERVAL = 300
+# Quiet polls stretch the interval by this factor; a poll with changes halves it
+POLL_BACKOFF = 1.5
+# Upper bound on stories scanned by a catch-up poll after a burst
+MAX_CATCHUP_ITEMS = 200
+
+def scrape_prothom_alo_latest(output_mode="upsert", collection_id=LATEST_COLLECTION_ID, max_items=50,
+                              since=None, use_embedded=True, concurrency=DEFAULT_CONCURRENCY,
+                              rate_per_host=DEFAULT_RATE_PER_HOST, state=None, store_format="jsonl", store=None):
     """
     Scrape latest news articles from Prothom Alo with simplified output:
     - Title in first column
     - Full article text in second column
     - Image URL in third column
+    - Story id in fourth column
+
+    Pages through the collection until `max_items` stories or the first one
+    published before `since` and returns the number of stories written.
+    `store_format` is the article store format (None for the CSV only); an
+    open CrawlState and ArticleStore can be passed in to reuse them across polls.
     """
     print("Starting to scrape latest news from Prothom Alo...")
-    
-    # Headers to mimic a browser
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
-        "Referer": "https://www.prothomalo.com/",
-        "Origin": "https://www.prothomalo.com"
-    }
-    
-    # API endpoint for the latest news
-    api_url = "https://www.prothomalo.com/api/v1/collections/43749?offset=0&limit=50"
-    
+
+    # Incremental runs only fetch stories that are new or republished
+    incremental = output_mode != "overwrite"
+    own_state = state is None
+    state = state or CrawlState(scope=CSV_FILENAME)
+    own_store = store is None
+    store = store or article_store.open_store(store_format, source="script_1")
+    saved = 0
+
+    # Don't page through more than we are going to use
+    page_size = min(DEFAULT_PAGE_SIZE, max_items) if max_items else DEFAULT_PAGE_SIZE
+
     # Create CSV file for storing data
-    with open('prothom_alo_latest.csv', 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(['title', 'description', 'image_url'])
-        
-        try:
-            print("Fetching latest articles list...")
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse JSON response
-            data = response.json()
-            
-            # Check if we have items in the response
-            if 'items' in data and len(data['items']) > 0:
-                print(f"Found {len(data['items'])} articles. Processing...")
-                
-                # Process each article
-                for i, item in enumerate(data['items']):
-                    article_id = item.get('id')
-                    if not article_id:
+    header = ['title', 'description', 'image_url', 'story_id']
+    with csv_output.open_csv(CSV_FILENAME, header, mode=output_mode, key_column='story_id') as writer:
+        # A new CSV (first run, or the old one was moved aside) has none of the
+        # stories in the crawl state, so this run fetches everything again
+        incremental = incremental and not writer.fresh
+
+        def story_jobs():
+            # Turn collection items into story fetch jobs, one page at a time
+            for i, item in enumerate(iter_collection_items(collection_id, page_size=page_size,
+                                                           max_items=max_items, since=since)):
+                article_id = item.get('id')
+                if not article_id:
+                    continue
+
+                # Extract headline
+                headline = item_headline(item)
+
+                # Skip stories we already have in this version
+                last_published_at = (item.get('story') or {}).get('last-published-at')
+                if incremental and not state.needs_fetch(article_id, published_at=last_published_at):
+                    continue
+
+                # Page URL and first publish time, for the article store
+                article = (item_article_url(item), item_published_at(item))
+
+                # Use the story embedded in the collection page when it has a body
+                if use_embedded:
+                    full_article, image_url = story_from_collection_item(item)
+                    if full_article:
+                        yield None, (i, article_id, headline, last_published_at, article, (full_article, image_url))
                         continue
-                    
-                    # Extract headline
-                    headline = ""
-                    if 'item' in item and 'headline' in item['item']:
-                        headline = " ".join(item['item']['headline'])
-                    
-                    # Get full article content
-                    article_api_url = f"https://www.prothomalo.com/api/v1/stories/{article_id}"
-                    
-                    try:
-                        # Add a delay to avoid being blocked
-                        time.sleep(random.uniform(1, 2.5))
-                        
-                        print(f"Fetching article {i+1}/{len(data['items'])}: {headline}")
-                        article_response = requests.get(article_api_url, headers=headers)
-                        article_response.raise_for_status()
-                        article_data = article_response.json()
-                        
-                        # Extract full article content
-                        full_article = ""
-                        image_url = ""
-                        
-                        # Get main image first
-                        if 'hero-image' in article_data:
-                            hero_image = article_data['hero-image']
-                            if 'hero-image-s3-url' in hero_image:
-                                image_url = hero_image['hero-image-s3-url']
-                            elif 'hero-image-url' in hero_image:
-                                image_url = hero_image['hero-image-url']
-                        
-                        # Extract article body
-                        if 'story-elements' in article_data:
-                            story_elements = article_data['story-elements']
-                            # Process each element
-                            for element in story_elements:
-                                if element['type'] == 'text':
-                                    if 'content' in element:
-                                        full_article += element['content'] + " "
-                                # Get first image URL if we don't have one yet
-                                elif element['type'] == 'image' and not image_url:
-                                    if 'image-s3-url' in element:
-                                        image_url = element['image-s3-url']
-                                    elif 'src' in element:
-                                        image_url = element['src']
-                        
-                        # Clean up article text
-                        full_article = full_article.strip()
-                        
-                        # Write to CSV
-                        writer.writerow([headline, full_article, image_url])
-                        print(f"Saved article successfully")
-                        
-                    except Exception as e:
-                        print(f"Error processing article: {e}")
+
+                yield story_api_url(article_id), (i, article_id, headline, last_published_at, article, None)
+
+        def fetch_story(article_api_url):
+            article_response = http_cache.cached_get(article_api_url, kind="json")
+            article_response.raise_for_status()
+            return article_response
+
+        def save_story(article_api_url, job, article_response):
+            nonlocal saved
+            i, article_id, headline, last_published_at, (article_url, published_ms), embedded = job
+            if embedded:
+                print(f"Using embedded article {i+1}: {headline}")
+                full_article, image_url = embedded
+                article_api_url = story_api_url(article_id)
             else:
-                print("No articles found in the API response")
-                
+                print(f"Fetched article {i+1}: {headline}")
+                full_article, image_url = parse_story(article_response.json())
+
+            status = state.record(article_id, article_api_url, content_hash(headline, full_article, image_url),
+                                  story_id=article_id, published_at=last_published_at)
+            if incremental and status == "unchanged":
+                print(f"Article unchanged since last run: {headline}")
+                return
+
+            # Write to CSV
+            writer.writerow([headline, full_article, image_url, article_id])
+            if store is not None:
+                # The API gives publish times in epoch milliseconds
+                published_at = (datetime.fromtimestamp(published_ms / 1000, tz=timezone.utc).isoformat()
+                                if published_ms else "")
+                store.append({"title": headline, "full_content": full_article, "image_url": image_url,
+                              "story_id": article_id, "article_url": article_url, "published_at": published_at})
+            saved += 1
+            print(f"Saved article successfully")
+
+        def report_error(article_api_url, job, error):
+            print(f"Error processing article: {error}")
+
+        try:
+            print("Fetching latest articles list...")
+            crawl(story_jobs(), fetch_story, save_story, concurrency=concurrency,
+                  rate_per_host=rate_per_host, on_error=report_error)
+
         except Exception as e:
             print(f"Error: {e}")
-    
-    print("\nScraping completed. Data saved to 'prothom_alo_latest.csv'")
+
+    if own_state:
+        state.close()
+    if store is not None:
+        if own_store:
+            store.close()
+        else:
+            store.flush()
+    print(f"\nScraping completed. Data saved to '{CSV_FILENAME}'")
+    http_cache.print_cache_stats()
+    return saved
+
+def watch_prothom_alo_latest(output_mode="upsert", collection_id=LATEST_COLLECTION_ID, poll_items=POLL_ITEMS,
+                             min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL, max_polls=None,
+                             store_format="jsonl"):
+    """
+    Keep polling the collection and save stories as soon as they appear or
+    are republished. Each poll reads the newest `poll_items` items (one
+    small, conditionally cached request) and only fetches stories whose id
+    or last-published-at is not in the crawl state. The interval halves
+    after a poll that found changes and stretches by POLL_BACKOFF after a
+    quiet one, within [min_interval, max_interval]. A poll whose items were
+    all new is followed at once by a deeper one, so bursts are not missed.
+    Runs until interrupted, or for `max_polls` polls.
+    """
+    if output_mode == "overwrite":
+        raise ValueError("Watch mode needs an incremental output mode ('append' or 'upsert')")
+
+    state = CrawlState(scope=CSV_FILENAME)
+    store = article_store.open_store(store_format, source="script_1")
+    interval = min_interval
+    items = poll_items
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            started = time.monotonic()
+            # Polls only append; rewriting the whole CSV every poll would make each one
+            # cost as much as the file is large, so upsert deduplicates once at shutdown
+            saved = scrape_prothom_alo_latest(output_mode="append", collection_id=collection_id,
+                                              max_items=items, state=state, store_format=store_format, store=store)
+            polls += 1
+
+            if saved >= items and items < MAX_CATCHUP_ITEMS:
+                # Everything we looked at was new: there may be more below
+                items = min(items * 2, MAX_CATCHUP_ITEMS)
+                print(f"{saved} new or updated stories, polling deeper ({items} items) right away")
+                continue
+            items = poll_items
+            if saved:
+                interval = max(min_interval, interval / 2)
+            else:
+                interval = min(max_interval, interval * POLL_BACKOFF)
+            print(f"{saved} new or updated stories; next poll in {interval:.0f}s")
+            if max_polls is None or polls < max_polls:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        state.close()
+        if store is not None:
+            store.close()
+        if output_mode == "upsert":
+            csv_output.drop_superseded_rows(CSV_FILENAME, 'story_id')
 
 if __name__ == "__main__":
-    scrape_prothom_alo_latest()
+    import sys
+    if "--watch" in sys.argv[1:]:
+        watch_prothom_alo_latest()
+    else:
+        scrape_prothom_alo_latest()
@@ -1,20 +1,10 @@
-import requests
+import http_cache
 import csv
-import time
-import random
 import json
 
 def scrape_prothom_alo_latest():
     print("Starting to scrape latest news from Prothom Alo...")
     
-    headers = {
-        "User -Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9,bn;q=0.8",
-        "Referer": "https://www.prothomalo.com/",
-        "Origin": "https://www.prothomalo.com"
-    }
-    
     api_url = "https://www.prothomalo.com/api/v1/collections/43749?offset=0&limit=50"
     
     with open('prothom_alo_latest.csv', 'w', newline='', encoding='utf-8') as file:
@@ -23,7 +13,7 @@ def scrape_prothom_alo_latest():
         
         try:
             print("Fetching latest articles list...")
-            response = requests.get(api_url, headers=headers)
+            response = http_cache.cached_get(api_url, kind="json")
             response.raise_for_status()
             data = response.json()
             
@@ -39,9 +29,8 @@ def scrape_prothom_alo_latest():
                     article_api_url = f"https://www.prothomalo.com/api/v1/stories/{article_id}"
                     
                     try:
-                        time.sleep(random.uniform(1, 2.5))
                         print(f"Fetching article {i+1}/{len(data['items'])}: {headline}")
-                        article_response = requests.get(article_api_url, headers=headers)
+                        article_response = http_cache.cached_get(article_api_url, kind="json")
                         article_response.raise_for_status()
                         article_data = article_response.json()
                         
@@ -82,6 +71,7 @@ def scrape_prothom_alo_latest():
             print(f"Error: {e}")
     
     print("\nScraping completed. Data saved to 'prothom_alo_latest.csv'")
+    http_cache.print_cache_stats()
 
 if __name__ == "__main__":
     scrape_prothom_alo_latest()
@@ -0,0 +1,234 @@
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http_session
+
+HOST = "127.0.0.1"
+PORT = 8765
+SERVER_URL = f"http://{HOST}:{PORT}"
+
+# A batch is dispatched when it reaches MAX_BATCH_SIZE articles or when the
+# oldest waiting request has waited MAX_WAIT seconds, whichever comes first
+MAX_BATCH_SIZE = 16
+MAX_WAIT = 0.02
+REQUEST_TIMEOUT = 600
+
+# Parameters each engine accepts from a request, with their defaults
+ENGINE_PARAMS = {
+    "rag": {"num_sentences": 3},
+    "lexrank": {"num_sentences": 3},
+    "mbart": {"max_length": 150},
+}
+
+
+class MicroBatcher:
+    """
+    Queue in front of one summarizer: requests from many handler threads are
+    coalesced into one summarize_many call per batch (per distinct parameter
+    set), run by a single worker thread that owns the model
+    """
+
+    def __init__(self, name, summarize_many, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT):
+        self.name = name
+        self.summarize_many = summarize_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.articles = 0
+        self.worker = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, text, params):
+        """Queue one article; returns a Future resolving to its summary"""
+        future = Future()
+        self.queue.put((text, params, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            groups = {}
+            for text, params, future in batch:
+                groups.setdefault(json.dumps(params, sort_keys=True), []).append((text, future))
+
+            for key, items in groups.items():
+                try:
+                    summaries = self.summarize_many([text for text, _ in items], **json.loads(key))
+                except Exception as e:
+                    print(f"{self.name} batch of {len(items)} failed: {e}")
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, future), summary in zip(items, summaries):
+                    future.set_result(summary)
+            self.batches += 1
+            self.articles += len(batch)
+
+
+def build_engines(engines=("rag", "mbart"), backend=None, preload=True):
+    """
+    Create a MicroBatcher per engine. Models are loaded up front (when
+    `preload`) so the first request does not pay for it, and stay resident.
+    Every engine goes through the shared summary cache.
+    """
+    from summary_cache import SummaryCache
+    from inference_backend import DEFAULT_BACKEND
+    backend = backend or DEFAULT_BACKEND
+    summary_cache = SummaryCache()
+    batchers = {}
+
+    if "rag" in engines:
+        import ragg_summarize
+        from embedding_cache import EmbeddingCache
+        from inference_backend import load_bert_backend, backend_model_key
+        from model_registry import BERT_MODEL_NAME
+        tokenizer, model = load_bert_backend(backend, BERT_MODEL_NAME)
+        cache = EmbeddingCache(backend_model_key(BERT_MODEL_NAME, backend), model.config.hidden_size)
+        batchers["rag"] = MicroBatcher("rag", lambda texts, **params: ragg_summarize.summarize_many_with_rag(
+            texts, model=model, tokenizer=tokenizer, cache=cache, backend=backend,
+            summary_cache=summary_cache, **params))
+
+    if "mbart" in engines:
+        from inference_backend import load_mbart_backend, load_transformer_summarizer
+        summarizer = load_transformer_summarizer()
+        if preload:
+            load_mbart_backend(backend)
+        # mBART batches are slow, so keep them to the size the summarizer is tuned for
+        batchers["mbart"] = MicroBatcher("mbart", lambda texts, **params: summarizer.summarize_many_with_transformer(
+            texts, backend=backend, summary_cache=summary_cache, **params),
+            max_batch_size=summarizer.DEFAULT_BATCH_SIZE * 2)
+
+    if "lexrank" in engines:
+        import lexrank_summarize
+        batchers["lexrank"] = MicroBatcher("lexrank", lambda texts, **params: lexrank_summarize.summarize_many_with_lexrank(
+            texts, summary_cache=summary_cache, **params), max_batch_size=256)
+
+    return batchers
+
+
+class SummarizeHandler(BaseHTTPRequestHandler):
+    """
+    POST /summarize with {"engine": "rag", "text": "..."} or {"texts": [...]},
+    plus optional engine parameters (num_sentences, max_length); answers
+    {"summary": ...} or {"summaries": [...]}. GET /health reports batch stats.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {name: {"batches": b.batches, "articles": b.articles, "queued": b.queue.qsize()}
+                              for name, b in self.server.batchers.items()})
+
+    def do_POST(self):
+        if self.path != "/summarize":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if not isinstance(request, dict):
+            self._send_json(400, {"error": "request body must be a JSON object"})
+            return
+        if "texts" in request:
+            if not isinstance(request["texts"], list) or not all(isinstance(t, str) for t in request["texts"]):
+                self._send_json(400, {"error": "'texts' must be a list of strings"})
+                return
+        elif not isinstance(request.get("text", ""), str):
+            self._send_json(400, {"error": "'text' must be a string"})
+            return
+
+        engine = request.get("engine", "rag")
+        batcher = self.server.batchers.get(engine)
+        if batcher is None:
+            self._send_json(400, {"error": f"engine '{engine}' is not loaded",
+                                  "engines": sorted(self.server.batchers)})
+            return
+        try:
+            params = {name: int(request.get(name, default)) for name, default in ENGINE_PARAMS[engine].items()}
+            if any(value < 1 for value in params.values()):
+                raise ValueError
+        except (TypeError, ValueError):
+            self._send_json(400, {"error": f"invalid parameters, expected positive integers for "
+                                           f"{list(ENGINE_PARAMS[engine])}"})
+            return
+
+        single = "texts" not in request
+        texts = [request.get("text", "")] if single else request["texts"]
+        futures = [batcher.submit(text, params) for text in texts]
+        try:
+            summaries = [future.result(timeout=REQUEST_TIMEOUT) for future in futures]
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"summary": summaries[0]} if single else {"summaries": summaries})
+
+    def log_message(self, format, *args):
+        # One line per request would drown the batch logs
+        pass
+
+
+def serve(host=HOST, port=PORT, engines=("rag", "mbart"), backend=None):
+    """Load the engines and serve summaries on host:port until interrupted"""
+    server = ThreadingHTTPServer((host, port), SummarizeHandler)
+    server.daemon_threads = True
+    server.batchers = build_engines(engines, backend=backend)
+    print(f"Summarization server on http://{host}:{port} (engines: {', '.join(server.batchers)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.server_close()
+
+
+def summarize_remote(texts, engine="rag", url=SERVER_URL, timeout=REQUEST_TIMEOUT, **params):
+    """
+    Summarize articles through a running server over a pooled keep-alive
+    connection. Accepts one text or a list; returns one summary or a list.
+    """
+    single = isinstance(texts, str)
+    payload = dict(params, engine=engine)
+    if single:
+        payload["text"] = texts
+    else:
+        payload["texts"] = list(texts)
+    response = http_session.get_session(url).post(url + "/summarize", json=payload, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    return data["summary"] if single else data["summaries"]
+
+
+if __name__ == "__main__":
+    # Usage: python summarize_server.py [engines, e.g. rag,mbart,lexrank]
+    serve(engines=sys.argv[1].split(",") if len(sys.argv) > 1 else ("rag", "mbart"))
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# SQLite file holding the summaries of every engine
+SUMMARY_CACHE_DB = "summary_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    engine TEXT,
+    model TEXT,
+    summary TEXT,
+    created REAL
+)
+"""
+
+
+def text_hash(text):
+    """Hash of an article body, insensitive to Unicode normalization form and whitespace"""
+    text = unicodedata.normalize("NFC", text or "")
+    text = re.sub(r'\s+', ' ', text).strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def summary_key(text, engine, model, params):
+    """Cache key for the summary of `text` by one engine, model and parameter set"""
+    settings = json.dumps({"engine": engine, "model": model, "params": params or {}}, sort_keys=True)
+    return hashlib.sha1(f"{text_hash(text)}\0{settings}".encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent summaries keyed by (content hash, engine, model, parameters),
+    so articles whose text has not changed are never summarized twice
+    """
+
+    def __init__(self, path=SUMMARY_CACHE_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """Return {key: summary} for the keys that are cached"""
+        found = {}
+        unique_keys = list(set(keys))
+        with self.lock:
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})", chunk))
+        return found
+
+    def put_many(self, engine, model, items):
+        """Store (key, summary) pairs"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, engine, model, summary, created) VALUES (?, ?, ?, ?, ?)",
+                [(key, engine, model, summary, now) for key, summary in items])
+            self.conn.commit()
+
+    def summarize(self, texts, engine, model, params, summarize_texts):
+        """
+        Return one summary per text, calling `summarize_texts(list_of_texts)`
+        only for the texts with no cached summary under these settings.
+        Empty or non-string texts are passed through uncached.
+        """
+        summaries = [None] * len(texts)
+        keys = {}
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and text.strip():
+                keys[i] = summary_key(text, engine, model, params)
+
+        found = self.get_many(list(keys.values()))
+        missing = []
+        for i in range(len(texts)):
+            if i in keys and keys[i] in found:
+                summaries[i] = found[keys[i]]
+            else:
+                missing.append(i)
+        self.hits += len(keys) - sum(1 for i in missing if i in keys)
+
+        if missing:
+            # Texts that hash the same are summarized once
+            first_by_key = {}
+            to_compute = []
+            for i in missing:
+                if i not in keys:
+                    to_compute.append(i)
+                elif keys[i] not in first_by_key:
+                    first_by_key[keys[i]] = i
+                    to_compute.append(i)
+            new_summaries = summarize_texts([texts[i] for i in to_compute])
+            for i, summary in zip(to_compute, new_summaries):
+                summaries[i] = summary
+            for i in missing:
+                if i in keys:
+                    summaries[i] = summaries[first_by_key[keys[i]]]
+            # Only the first copy of each text is computed; its duplicates count as hits
+            self.misses += len(first_by_key)
+            self.hits += sum(1 for i in missing if i in keys) - len(first_by_key)
+            self.put_many(engine, model, [(key, summaries[i]) for key, i in first_by_key.items()])
+        return summaries
+
+    def print_stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        print(f"Summary cache: {self.hits} hits, {self.misses} computed ({rate:.0%} hit rate)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()